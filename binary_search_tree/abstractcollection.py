@@ -3,6 +3,8 @@ File: abstractcollection.py
 Author: Ken Lambert
 """
 
+import memoryprofile
+
 class AbstractCollection(object):
     """An abstract collection implementation."""
 
@@ -28,6 +30,21 @@ class AbstractCollection(object):
         """Returns the string representation of self."""
         return "[" + ", ".join(map(str, self)) + "]"
 
+    def memory_report(self):
+        """Returns a dict with the bytes used by self per element,
+        its node count and the split between keys and structure."""
+        return memoryprofile.memory_report(self)
+
+    def _nodes(self):
+        """Supports iteration over the nodes holding the items
+        of self. Linked collections override it."""
+        return iter(())
+
+    def _buffers(self):
+        """Supports iteration over the lists holding the items
+        of self. Array-based collections override it."""
+        return iter(())
+
     def __add__(self, other):
         """Returns a new bag containing the contents
         of self and other."""
@@ -0,0 +1,89 @@
+"""
+File: arrayqueue.py
+
+A queue kept in a circular array: a list of fixed capacity with
+the front at index _front, wrapping around its end. The list doubles
+when full and halves when a quarter full, so add and pop are
+amortized O(1) and allocate no node per item.
+"""
+
+from abstractcollection import AbstractCollection
+
+class ArrayQueue(AbstractCollection):
+    """An array-based queue implementation."""
+
+    DEFAULT_CAPACITY = 16
+
+    # Constructor
+    def __init__(self, sourceCollection = None):
+        """Sets the initial state of self, which includes the
+        contents of sourceCollection, if it's present."""
+        self._items = [None] * ArrayQueue.DEFAULT_CAPACITY
+        self._front = 0
+        AbstractCollection.__init__(self, sourceCollection)
+
+    # Accessor methods
+    def __iter__(self):
+        """Supports iteration over a view of self,
+        from front to rear."""
+        items, front = self._items, self._front
+        if front + self._size <= len(items):
+            return iter(items[front:front + self._size])
+        return iter(items[front:] +
+                    items[:front + self._size - len(items)])
+
+    def _buffers(self):
+        """Supports iteration over the list holding the items."""
+        yield self._items
+
+    def peek(self):
+        """
+        Returns the item at the front of the queue.
+        Precondition: the queue is not empty.
+        Raises: KeyError if the queue is empty."""
+        if self.isEmpty():
+            raise KeyError("The queue is empty.")
+        return self._items[self._front]
+
+    # Mutator methods
+    def clear(self):
+        """Makes self become empty."""
+        self._size = 0
+        self._items = [None] * ArrayQueue.DEFAULT_CAPACITY
+        self._front = 0
+
+    def _resize(self, capacity):
+        """Moves the items, front first, to a list of capacity."""
+        items = list(self)
+        self._items = items + [None] * (capacity - len(items))
+        self._front = 0
+
+    def add(self, item):
+        """Adds item to the rear of the queue."""
+        if self._size == len(self._items):
+            self._resize(2 * len(self._items))
+        rear = self._front + self._size
+        if rear >= len(self._items):
+            rear -= len(self._items)
+        self._items[rear] = item
+        self._size += 1
+
+    def pop(self):
+        """
+        Removes and returns the item at the front of the queue.
+        Precondition: the queue is not empty.
+        Raises: KeyError if the queue is empty.
+        Postcondition: the front item is removed from the queue."""
+        if self.isEmpty():
+            raise KeyError("The queue is empty.")
+        items = self._items
+        oldItem = items[self._front]
+        items[self._front] = None
+        self._front += 1
+        if self._front == len(items):
+            self._front = 0
+        self._size -= 1
+        if self._size <= len(items) // 4 and \
+           len(items) > ArrayQueue.DEFAULT_CAPACITY:
+            self._resize(len(items) // 2)
+        return oldItem
@@ -0,0 +1,59 @@
+"""
+File: arraystack.py
+
+A stack kept in a Python list, top at the end: push and pop
+are amortized O(1) and allocate no node per item.
+"""
+
+from abstractstack import AbstractStack
+
+class ArrayStack(AbstractStack):
+    """An array-based stack implementation."""
+
+    # Constructor
+    def __init__(self, sourceCollection = None):
+        """Sets the initial state of self, which includes the
+        contents of sourceCollection, if it's present."""
+        self._items = list()
+        AbstractStack.__init__(self, sourceCollection)
+
+    # Accessor methods
+    def __iter__(self):
+        """Supports iteration over a view of self,
+        from bottom to top."""
+        return iter(self._items[:])
+
+    def _buffers(self):
+        """Supports iteration over the list holding the items."""
+        yield self._items
+
+    def peek(self):
+        """
+        Returns the item at the top of the stack.
+        Precondition: the stack is not empty.
+        Raises: KeyError if the stack is empty."""
+        if self.isEmpty():
+            raise KeyError("The stack is empty.")
+        return self._items[-1]
+
+    # Mutator methods
+    def clear(self):
+        """Makes self become empty."""
+        self._size = 0
+        self._items = list()
+
+    def push(self, item):
+        """Adds item to the top of the stack."""
+        self._items.append(item)
+        self._size += 1
+
+    def pop(self):
+        """
+        Removes and returns the item at the top of the stack.
+        Precondition: the stack is not empty.
+        Raises: KeyError if the stack is empty.
+        Postcondition: the top item is removed from the stack."""
+        if self.isEmpty():
+            raise KeyError("The stack is empty.")
+        self._size -= 1
+        return self._items.pop()
@@ -0,0 +1,80 @@
+import asyncio
+import gc
+from linkedbst import LinkedBST
+from random import shuffle
+from time import perf_counter
+
+
+async def ticker(lags, stop, period=0.001):
+    '''Sleep for period again and again until stop is set,
+    recording how late every wakeup was'''
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(period)
+        lags.append(perf_counter() - start - period)
+
+
+async def time_maintenance(name, job):
+    '''Run job next to a ticker; return (name, seconds, lags)'''
+    lags = list()
+    stop = asyncio.Event()
+    tick = asyncio.ensure_future(ticker(lags, stop))
+    await asyncio.sleep(0.01)
+    start = perf_counter()
+    await job()
+    elapsed = perf_counter() - start
+    stop.set()
+    await tick
+    return name, elapsed, sorted(lags)
+
+
+async def total_test(n=300000):
+    '''Return the ticker lags during every maintenance job'''
+    items = list(range(n))
+    shuffle(items)
+    tree = LinkedBST()
+    await tree.aload(items)
+
+    async def rebalance():
+        tree.rebalance()
+
+    async def height():
+        tree.height()
+
+    async def traverse():
+        for _ in tree.inorder():
+            pass
+
+    async def atraverse():
+        async for _ in tree:
+            pass
+
+    results = list()
+    for name, job in (('rebalance', rebalance),
+                      ('arebalance', tree.arebalance),
+                      ('height', height),
+                      ('aheight', tree.aheight),
+                      ('inorder', traverse),
+                      ('ainorder', atraverse),
+                      ('aload', lambda: LinkedBST().aload(items))):
+        results.append(await time_maintenance(name, job))
+    return results
+
+
+if __name__ == '__main__':
+    # Building hundreds of thousands of nodes sets off full runs of
+    # the cyclic garbage collector, which stall every thread; the
+    # second table leaves them out to show the tree's own pauses
+    for collector in (True, False):
+        print('\ngarbage collector', 'on' if collector else 'off')
+        if collector:
+            gc.enable()
+        else:
+            gc.disable()
+        print('{:>12} {:>9} {:>9} {:>9} {:>9}'.format(
+            'job', 'seconds', 'p50 ms', 'p99 ms', 'max ms'))
+        for name, elapsed, lags in asyncio.run(total_test()):
+            print('{:>12} {:>9.3f} {:>9.2f} {:>9.2f} {:>9.2f}'.format(
+                name, elapsed, lags[len(lags) // 2] * 1000,
+                lags[int(len(lags) * 0.99)] * 1000, lags[-1] * 1000))
+    gc.enable()
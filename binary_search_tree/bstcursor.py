@@ -0,0 +1,170 @@
+"""
+File: bstcursor.py
+
+A bidirectional cursor over a LinkedBST.
+"""
+
+
+class BSTCursor(object):
+    """Walks a LinkedBST in order from an arbitrary position.
+
+    The cursor keeps the path from the root to its current node,
+    together with the key range every node on the path may hold.
+    Moving to a neighbour only climbs or descends that path, so
+    next() and prev() run in amortized O(1), and seek() and insert()
+    start from the current position (finger search) instead of the
+    root. Changing the tree by other means invalidates the cursor."""
+
+    def __init__(self, tree):
+        self._tree = tree
+        self._path = list()  # (node, low, high): low <= node.data < high
+        self._modCount = tree._modCount
+
+    # Accessor methods
+    def isValid(self):
+        """Returns True if the cursor is on an item."""
+        return bool(self._path) and self._modCount == self._tree._modCount
+
+    def item(self):
+        """Returns the item under the cursor, or None if the cursor
+        has moved past either end."""
+        self._check()
+        return self._path[-1][0].data if self._path else None
+
+    def __iter__(self):
+        """Supports an inorder traversal from the current item on."""
+        item = self.item()
+        while item is not None:
+            yield item
+            item = self.next()
+
+    def _check(self):
+        if self._modCount != self._tree._modCount:
+            raise RuntimeError("Tree changed since the cursor was positioned.")
+
+    # Positioning methods
+    def _descend(self, node, low, high, toLeft):
+        """Pushes node and then its leftmost (or rightmost) chain."""
+        while node is not None:
+            self._path.append((node, low, high))
+            if toLeft:
+                high = node.data
+                node = node.left
+            else:
+                low = node.data
+                node = node.right
+
+    def _reset(self):
+        self._path = list()
+        self._modCount = self._tree._modCount
+
+    def first(self):
+        """Moves to the smallest item and returns it, or None if the
+        tree is empty."""
+        self._reset()
+        self._descend(self._tree._root, None, None, True)
+        return self.item()
+
+    def last(self):
+        """Moves to the largest item and returns it, or None if the
+        tree is empty."""
+        self._reset()
+        self._descend(self._tree._root, None, None, False)
+        return self.item()
+
+    def next(self):
+        """Moves to the next item in order and returns it, or None
+        if there is none."""
+        self._check()
+        if not self._path:
+            return None
+        node, low, high = self._path[-1]
+        if node.right is not None:
+            self._descend(node.right, node.data, high, True)
+        else:
+            child = self._path.pop()[0]
+            while self._path and self._path[-1][0].right is child:
+                child = self._path.pop()[0]
+        return self.item()
+
+    def prev(self):
+        """Moves to the previous item in order and returns it, or None
+        if there is none."""
+        self._check()
+        if not self._path:
+            return None
+        node, low, high = self._path[-1]
+        if node.left is not None:
+            self._descend(node.left, low, node.data, False)
+        else:
+            child = self._path.pop()[0]
+            while self._path and self._path[-1][0].left is child:
+                child = self._path.pop()[0]
+        return self.item()
+
+    def _climb(self, item, strict):
+        """Pops the path up to the lowest node whose subtree may hold
+        item and returns that node with its bounds. With strict, an
+        item equal to the lower bound is left to the ancestor holding
+        it, which is what seek needs; insert places it to the right."""
+        if self._modCount != self._tree._modCount:
+            self._reset()
+        while self._path:
+            node, low, high = self._path.pop()
+            if (low is None or low < item or
+                    (not strict and low == item)) and \
+               (high is None or item < high):
+                return node, low, high
+        return self._tree._root, None, None
+
+    def seek(self, item):
+        """Moves to the smallest item >= item and returns it, or None
+        if there is none. The search starts from the current position,
+        so seeking near it costs far less than a search from the root.
+        Of several equal items, the cursor lands on the first in order."""
+        node, low, high = self._climb(item, True)
+        while node is not None:
+            self._path.append((node, low, high))
+            # an equal node may have equal items in its left subtree
+            if not node.data < item:
+                high = node.data
+                node = node.left
+            else:
+                low = node.data
+                node = node.right
+        if self._path and self._path[-1][0].data < item:
+            return self.next()
+        return self.item()
+
+    # Mutator methods
+    def insert(self, item):
+        """Adds item to the tree, searching for its spot from the
+        current position, and moves the cursor onto it."""
+        self._tree._checkMutable()
+        node, low, high = self._climb(item, False)
+        newNode = self._tree._nodeType(item)
+        if node is None:
+            self._tree._root = newNode
+        else:
+            while True:
+                self._path.append((node, low, high))
+                if item < node.data:
+                    high = node.data
+                    if node.left is None:
+                        node.left = newNode
+                        break
+                    node = node.left
+                else:
+                    low = node.data
+                    if node.right is None:
+                        node.right = newNode
+                        break
+                    node = node.right
+        self._path.append((newNode, low, high))
+        self._tree._size += 1
+        self._tree._track(item)
+        self._tree._updatePath(entry[0] for entry in self._path)
+        self._tree._keepExtremes(item, True)
+        self._tree._modCount += 1
+        self._modCount = self._tree._modCount
+        return item
@@ -0,0 +1,142 @@
+"""
+File: bstrenderer.py
+
+Renders a LinkedBST as text in O(n) time, without recursion,
+streaming the lines into any file-like object.
+
+Layouts:
+    sideways  the tree rotated 90 degrees counterclockwise, one node
+              per line indented by "| " per level (LinkedBST.__str__)
+    topdown   a preorder outline, children indented under their
+              parent and marked L or R
+    summary   size, height and the number of nodes on every level,
+              for trees too large to print
+A subtree cut off by maxDepth shows as "...", and output stops
+with a note once maxNodes nodes have been written. By default
+indentation stops growing at INDENT_LIMIT levels, where the level
+number is written instead, so that the output of a degenerate tree
+stays O(n) as well; indentLimit=None indents fully, as
+LinkedBST.__str__ does.
+"""
+
+import sys
+
+LAYOUTS = ('sideways', 'topdown', 'summary')
+BATCH = 1024  # lines collected before each write
+INDENT_LIMIT = 64
+
+
+class _Writer(object):
+    """Collects lines and writes them to out in batches."""
+
+    def __init__(self, out):
+        self._out = out
+        self._lines = list()
+
+    def line(self, text):
+        self._lines.append(text)
+        if len(self._lines) >= BATCH:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self._out.write("\n".join(self._lines) + "\n")
+            self._lines = list()
+
+
+def render(tree, out=None, layout='sideways', maxDepth=None, maxNodes=None,
+           indentLimit=INDENT_LIMIT):
+    """Writes tree to out (sys.stdout by default) in layout and
+    returns the number of nodes written. Levels below maxDepth and
+    nodes beyond the first maxNodes are left out, and levels deeper
+    than indentLimit are numbered instead of indented further."""
+    if layout not in LAYOUTS:
+        raise ValueError("layout must be one of " + ", ".join(LAYOUTS))
+    writer = _Writer(sys.stdout if out is None else out)
+    if layout == 'summary':
+        written = _summary(tree, writer)
+    elif layout == 'sideways':
+        written = _sideways(tree, writer, maxDepth, maxNodes, indentLimit)
+    else:
+        written = _topdown(tree, writer, maxDepth, maxNodes, indentLimit)
+    writer.flush()
+    return written
+
+
+def _indent(unit, level, limit):
+    if limit is None or level <= limit:
+        return unit * level
+    return unit * limit + "<%d> " % level
+
+
+def _tooDeep(level, maxDepth):
+    return maxDepth is not None and level > maxDepth
+
+
+def _stopped(writer, written, tree):
+    writer.line("... stopped after %d of %d nodes" % (written, len(tree)))
+
+
+def _sideways(tree, writer, maxDepth, maxNodes, indentLimit):
+    """Reverse inorder: right subtree, node, left subtree."""
+    written = 0
+    stack = list()
+    node, level = tree._root, 0
+    while stack or node is not None:
+        while node is not None:
+            if _tooDeep(level, maxDepth):
+                writer.line(_indent("| ", level, indentLimit) + "...")
+                break
+            stack.append((node, level))
+            node, level = node.right, level + 1
+        if not stack:
+            break
+        node, level = stack.pop()
+        if written == maxNodes:
+            _stopped(writer, written, tree)
+            break
+        writer.line(_indent("| ", level, indentLimit) + str(node.data))
+        written += 1
+        node, level = node.left, level + 1
+    return written
+
+
+def _topdown(tree, writer, maxDepth, maxNodes, indentLimit):
+    """Preorder: node, then its left and right subtrees."""
+    written = 0
+    stack = [(tree._root, 0, "")] if tree._root is not None else []
+    while stack:
+        node, level, tag = stack.pop()
+        if _tooDeep(level, maxDepth):
+            writer.line(_indent("  ", level, indentLimit) + tag + "...")
+            continue
+        if written == maxNodes:
+            _stopped(writer, written, tree)
+            break
+        writer.line(_indent("  ", level, indentLimit) + tag + str(node.data))
+        written += 1
+        if node.right is not None:
+            stack.append((node.right, level + 1, "R "))
+        if node.left is not None:
+            stack.append((node.left, level + 1, "L "))
+    return written
+
+
+def _summary(tree, writer):
+    """Size, height and per-level counts, one level at a time."""
+    counts = list()
+    level = [tree._root] if tree._root is not None else []
+    while level:
+        counts.append(len(level))
+        nextLevel = list()
+        for node in level:
+            if node.left is not None:
+                nextLevel.append(node.left)
+            if node.right is not None:
+                nextLevel.append(node.right)
+        level = nextLevel
+    writer.line("size %d" % len(tree))
+    writer.line("height %d" % (len(counts) - 1))
+    for depth, count in enumerate(counts):
+        writer.line("level %d: %d" % (depth, count))
+    return 0
@@ -0,0 +1,213 @@
+"""
+File: intervaltree.py
+
+An interval tree: a LinkedBST of (low, high) pairs ordered by low
+end, whose nodes also hold the largest high end in their subtree.
+That lets stabbing and overlap queries skip every subtree that
+ends before the query starts. On a balanced tree a query finding
+k intervals visits O(min(n, (k + 1) log n)) nodes: each interval
+found may lie at the end of its own path down the tree, next to
+subtrees that are entered but hold nothing that overlaps.
+"""
+
+from bstnode import BSTNode
+from linkedbst import LinkedBST
+
+
+class IntervalNode(BSTNode):
+    """A BSTNode holding an interval and the largest high end
+    of the intervals in its subtree."""
+
+    def __init__(self, data, left = None, right = None):
+        BSTNode.__init__(self, data, left, right)
+        self.maxEnd = data[1]
+
+
+def _maxEnd(node):
+    """Returns the largest high end under node, from its children."""
+    maxEnd = node.data[1]
+    if node.left is not None and node.left.maxEnd > maxEnd:
+        maxEnd = node.left.maxEnd
+    if node.right is not None and node.right.maxEnd > maxEnd:
+        maxEnd = node.right.maxEnd
+    return maxEnd
+
+
+class IntervalTree(LinkedBST):
+    """A link-based interval tree of closed intervals (low, high)."""
+
+    _nodeType = IntervalNode
+
+    def _interval(self, item):
+        low, high = item
+        if high < low:
+            raise ValueError("Interval ends before it starts.")
+        return (low, high)
+
+    def _updatePath(self, nodes):
+        """Recomputes maxEnd on nodes, listed from the root down."""
+        for node in reversed(list(nodes)):
+            node.maxEnd = _maxEnd(node)
+
+    # Accessor methods
+    def overlap(self, low, high):
+        """Returns the intervals that share a point with [low, high],
+        in order, in O(min(n, (k + 1) log n)) for k intervals found
+        on a balanced tree. Subtrees ending before low are skipped,
+        and the walk stops at the first interval starting after
+        high."""
+        found = list()
+        stack = list()
+        node = self._root
+        while stack or node is not None:
+            while node is not None and node.maxEnd >= low:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.data[0] > high:
+                break
+            if node.data[1] >= low:
+                found.append(node.data)
+            node = node.right
+        return found
+
+    def stab(self, point):
+        """Returns the intervals containing point, in order."""
+        return self.overlap(point, point)
+
+    # Mutator methods
+    def add(self, item):
+        """Adds the interval item, a (low, high) pair, to the tree.
+        Raises: ValueError if high < low."""
+        self._checkMutable()
+        item = self._interval(item)
+        newNode = IntervalNode(item)
+        path = list()
+        node = self._root
+        if node is None:
+            self._root = newNode
+        else:
+            while True:
+                path.append(node)
+                if item < node.data:
+                    if node.left is None:
+                        node.left = newNode
+                        break
+                    node = node.left
+                elif node.right is None:
+                    node.right = newNode
+                    break
+                else:
+                    node = node.right
+        # A new interval can only raise maxEnd on its path
+        for node in path:
+            if node.maxEnd < item[1]:
+                node.maxEnd = item[1]
+        self._size += 1
+        self._track(item)
+        self._keepExtremes(item, True)
+        self._modCount += 1
+
+    def remove(self, item):
+        """Precondition: item is in self.
+        Raises: KeyError if item is not in self.
+        postcondition: item is removed from self."""
+        self._checkMutable()
+        path = list()
+        node = self._root
+        while node is not None and node.data != item:
+            path.append(node)
+            node = node.left if item < node.data else node.right
+        if node is None:
+            raise KeyError("Item not in tree.")
+        removed = node.data
+
+        # A node with two children takes the largest interval
+        # of its left subtree, whose node is removed instead
+        if node.left is not None and node.right is not None:
+            top = node
+            path.append(node)
+            node = node.left
+            while node.right is not None:
+                path.append(node)
+                node = node.right
+            top.data = node.data
+
+        child = node.left if node.left is not None else node.right
+        if not path:
+            self._root = child
+        elif path[-1].left is node:
+            path[-1].left = child
+        else:
+            path[-1].right = child
+        self._updatePath(path)
+        self._size -= 1
+        self._track(removed, -1)
+        self._keepExtremes(removed, False)
+        self._modCount += 1
+        return removed
+
+    def replace(self, item, newItem):
+        """
+        If item is in self, replaces it with newItem and
+        returns the old item, or returns None otherwise."""
+        if self.find(item) is None:
+            return None
+        self._interval(newItem)
+        removed = self.remove(item)
+        self.add(newItem)
+        return removed
+
+    def buildFromSorted(self, items):
+        """Replaces the contents of the tree with a balanced tree
+        built from intervals sorted in ascending order, and sets
+        maxEnd bottom-up in one more O(n) pass."""
+        LinkedBST.buildFromSorted(self, [self._interval(item)
+                                         for item in items])
+        # every descendant comes after its ancestors in preorder
+        for node in reversed(list(self._nodes())):
+            node.maxEnd = _maxEnd(node)
+
+
+def benchmark(n=100000, queries=200, seed=0):
+    """Times stabbing and overlap queries on n random time windows
+    against a scan of the list, checking that the answers agree."""
+    from random import Random
+    from time import perf_counter
+
+    rng = Random(seed)
+    span = n * 10
+    intervals = list()
+    for _ in range(n):
+        low = rng.randrange(span)
+        intervals.append((low, low + rng.randrange(1, 100)))
+    tree = IntervalTree()
+    start = perf_counter()
+    tree.buildFromSorted(sorted(intervals))
+    print("built %d intervals in %.3f s" % (n, perf_counter() - start))
+
+    points = [rng.randrange(span) for _ in range(queries)]
+    windows = [(p, p + rng.randrange(1000)) for p in points]
+    for name, args, scan in (
+            ("stab", [(p,) for p in points],
+             lambda p: [i for i in intervals if i[0] <= p <= i[1]]),
+            ("overlap", windows,
+             lambda low, high: [i for i in intervals
+                                if i[0] <= high and i[1] >= low])):
+        query = getattr(tree, name)
+        start = perf_counter()
+        results = [query(*a) for a in args]
+        treeTime = perf_counter() - start
+        start = perf_counter()
+        expected = [sorted(scan(*a)) for a in args]
+        scanTime = perf_counter() - start
+        assert results == expected
+        print("%8s: tree %.4f s, scan %.4f s, %.0fx faster, %.1f found "
+              "per query" % (name, treeTime, scanTime, scanTime / treeTime,
+                             sum(map(len, results)) / len(results)))
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,143 @@
+"""
+File: keyloader.py
+
+Streaming loader for large key files.
+Keys are read in fixed-size chunks, normalized, deduplicated
+and handed to LinkedBST.buildFromSorted, so only one list of
+unique keys is ever held in memory next to the tree itself.
+"""
+
+from codecs import getincrementaldecoder
+from io import IncrementalNewlineDecoder
+from time import time
+from linkedbst import LinkedBST
+
+
+class LoadStats(object):
+    """Progress and throughput counters of a single load."""
+
+    def __init__(self):
+        self.bytes_read = 0
+        self.lines = 0
+        self.keys = 0
+        self.duplicates = 0
+        self.start = time()
+        self.end = None
+
+    def elapsed(self):
+        '''Return seconds spent loading so far'''
+        end = self.end if self.end is not None else time()
+        return max(end - self.start, 1e-9)
+
+    def bytes_per_second(self):
+        '''Return read throughput in bytes per second'''
+        return self.bytes_read / self.elapsed()
+
+    def keys_per_second(self):
+        '''Return unique keys loaded per second'''
+        return self.keys / self.elapsed()
+
+    def __str__(self):
+        return '{:.1f} MB read, {} lines, {} keys, {} duplicates, ' \
+               '{:.2f} s ({:.1f} MB/s, {:.0f} keys/s)'.format(
+                   self.bytes_read / 2**20, self.lines, self.keys,
+                   self.duplicates, self.elapsed(),
+                   self.bytes_per_second() / 2**20, self.keys_per_second())
+
+
+def iter_keys(path, chunk_size=1 << 20, normalize=str.strip,
+              stats=None, progress=None, encoding='utf-8'):
+    '''
+    Yield normalized, non-empty keys from the file at path.
+    The file is read chunk_size bytes at a time, so memory use
+    does not depend on the size of the file; newlines are
+    translated as in text mode.
+    :param normalize: applied to every line, e.g. str.strip or
+                      lambda s: s.strip().lower()
+    :param stats: LoadStats to update, optional
+    :param progress: called with stats after every chunk, optional
+    '''
+    if stats is None:
+        stats = LoadStats()
+    tail = ''
+    decoder = IncrementalNewlineDecoder(
+        getincrementaldecoder(encoding)(), True)
+    with open(path, 'rb') as file:
+        while True:
+            data = file.read(chunk_size)
+            stats.bytes_read += len(data)
+            lines = (tail + decoder.decode(data, not data)).split('\n')
+            tail = lines.pop()
+            stats.lines += len(lines)
+            for line in lines:
+                key = normalize(line)
+                if key:
+                    yield key
+            if not data:
+                break
+            if progress is not None:
+                progress(stats)
+    if tail:
+        stats.lines += 1
+        key = normalize(tail)
+        if key:
+            yield key
+
+
+def unique_keys(keys, stats=None):
+    '''
+    Return a sorted list of the distinct keys.
+    While the input arrives in order, duplicates are dropped by
+    comparing with the previous key; the first out-of-order key
+    switches to a set, and the list is sorted in place at the end.
+    '''
+    if stats is None:
+        stats = LoadStats()
+    result = list()
+    seen = None
+    for key in keys:
+        if seen is None:
+            if not result or result[-1] < key:
+                result.append(key)
+                stats.keys += 1
+                continue
+            if result[-1] == key:
+                stats.duplicates += 1
+                continue
+            seen = set(result)
+        if key in seen:
+            stats.duplicates += 1
+        else:
+            seen.add(key)
+            result.append(key)
+            stats.keys += 1
+    if seen is not None:
+        seen = None  # release the set before sorting
+        result.sort()
+    return result
+
+
+def load_tree(path, tree=None, stats=None, **kwargs):
+    '''
+    Load the distinct keys of the file at path into a balanced
+    tree and return it. Extra keyword arguments go to iter_keys.
+    '''
+    if tree is None:
+        tree = LinkedBST()
+    if stats is None:
+        stats = LoadStats()
+    keys = unique_keys(iter_keys(path, stats=stats, **kwargs), stats)
+    tree.buildFromSorted(keys)
+    stats.end = time()
+    return tree
+
+
+if __name__ == '__main__':
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'words.txt'
+    stats = LoadStats()
+    tree = load_tree(path, stats=stats,
+                     progress=lambda s: print('\r' + str(s), end=''))
+    print('\r' + str(stats))
+    print('size', len(tree), 'height', tree.height())
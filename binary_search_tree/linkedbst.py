@@ -5,40 +5,76 @@ Author: Ken Lambert
 
 from abstractcollection import AbstractCollection
 from bstnode import BSTNode
-from linkedstack import LinkedStack
+from bstcursor import BSTCursor
+from arraystack import ArrayStack
 from linkedqueue import LinkedQueue
 from math import log, inf
+from io import StringIO
+from heapq import merge
+import asyncio
+import bstrenderer
+
+
+MASK = (1 << 64) - 1
+
+
+def itemHash(item):
+    """Returns a 64-bit hash of item, scrambled so that sums of the
+    hashes of different multisets of items rarely collide."""
+    h = hash(item) & MASK
+    h = (h ^ (h >> 30)) * 0xbf58476d1ce4e5b9 & MASK
+    h = (h ^ (h >> 27)) * 0x94d049bb133111eb & MASK
+    return h ^ (h >> 31)
+
+
+def _sortInRuns(items, run=8192):
+    """Returns items sorted. Sorting short runs and merging them
+    lets other threads run in between, which one long sort would
+    not."""
+    if len(items) <= run:
+        return sorted(items)
+    return list(merge(*[sorted(items[i:i + run])
+                        for i in range(0, len(items), run)]))
 
 
 class LinkedBST(AbstractCollection):
     """An link-based binary search tree implementation."""
 
+    _nodeType = BSTNode  # subclasses may keep more data per node
+    asyncChunk = 1000  # nodes visited between turns of the event loop
+
     def __init__(self, sourceCollection=None):
         """Sets the initial state of self, which includes the
         contents of sourceCollection, if it's present."""
         self._root = None
+        self._modCount = 0
+        self._fingerprint = 0
+        self._frozen = False
+        # the extreme items, valid while their stamp equals _modCount
+        self._minItem = self._maxItem = None
+        self._minStamp = self._maxStamp = -1
         AbstractCollection.__init__(self, sourceCollection)
 
     # Accessor methods
     def __str__(self):
         """Returns a string representation with the tree rotated
         90 degrees counterclockwise."""
-
-        def recurse(node, level):
-            s = ""
-            if node is not None:
-                s += recurse(node.right, level + 1)
-                s += "| " * level
-                s += str(node.data) + "\n"
-                s += recurse(node.left, level + 1)
-            return s
-
-        return recurse(self._root, 0)
+        out = StringIO()
+        bstrenderer.render(self, out, indentLimit=None)
+        return out.getvalue()
+
+    def render(self, out=None, layout='sideways', maxDepth=None,
+               maxNodes=None, indentLimit=bstrenderer.INDENT_LIMIT):
+        """Writes self to the file-like object out (sys.stdout by
+        default) in O(n); see bstrenderer for the layouts and limits.
+        Returns the number of nodes written."""
+        return bstrenderer.render(self, out, layout, maxDepth, maxNodes,
+                                  indentLimit)
 
     def __iter__(self):
         """Supports a preorder traversal on a view of self."""
         if not self.isEmpty():
-            stack = LinkedStack()
+            stack = ArrayStack()
             stack.push(self._root)
             while not stack.isEmpty():
                 node = stack.pop()
@@ -48,6 +84,17 @@ class LinkedBST(AbstractCollection):
                 if node.left is not None:
                     stack.push(node.left)
 
+    def _nodes(self):
+        """Supports a preorder traversal over the nodes of self."""
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+
     def preorder(self):
         """Supports a preorder traversal on a view of self.
         Algorithm Preorder(tree)
@@ -145,6 +192,54 @@ class LinkedBST(AbstractCollection):
             recurse(self._root, level=i)
         return iter(lyst)
 
+    def fingerprint(self):
+        """Returns a hash of the items of self that does not depend
+        on their order or on the shape of the tree. It is kept up to
+        date by every mutator, so reading it is O(1). Returns None if
+        an item that is not hashable has been added since the tree
+        was last cleared or built."""
+        return self._fingerprint
+
+    def __eq__(self, other):
+        """Returns True if other is a tree of the same type holding
+        the same items. Trees of different sizes or fingerprints
+        differ in O(1); otherwise their items are compared in order."""
+        if self is other: return True
+        if type(self) != type(other) or len(self) != len(other):
+            return False
+        if self._fingerprint is not None and \
+           other._fingerprint is not None and \
+           self._fingerprint != other._fingerprint:
+            return False
+        for a, b in zip(self._inorderItems(), other._inorderItems()):
+            if a != b:
+                return False
+        return True
+
+    def __hash__(self):
+        """Returns a hash of the items of a frozen tree.
+        Raises: TypeError if the tree is not frozen."""
+        if not self._frozen:
+            raise TypeError("unhashable LinkedBST: call freeze() first")
+        # a frozen tree always has a fingerprint, see freeze
+        return hash((self._size, self._fingerprint))
+
+    def isFrozen(self):
+        """Returns True if self can no longer change."""
+        return self._frozen
+
+    def _inorderItems(self):
+        """Supports a lazy inorder traversal, without recursion."""
+        stack = list()
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.data
+            node = node.right
+
     def __contains__(self, item):
         """Returns True if target is found or False otherwise."""
         return self.find(item) is not None
@@ -152,56 +247,90 @@ class LinkedBST(AbstractCollection):
     def find(self, item):
         """If item matches an item in self, returns the
         matched item, or None otherwise."""
-
-        def recurse(node):
-            if node is None:
-                return None
-            elif item == node.data:
+        node = self._root
+        while node is not None:
+            if item == node.data:
                 return node.data
             elif item < node.data:
-                return recurse(node.left)
+                node = node.left
             else:
-                return recurse(node.right)
-
-        return recurse(self._root)
+                node = node.right
+        return None
 
     # Mutator methods
+    def freeze(self):
+        """Makes self immutable, and so hashable, and returns it.
+        Raises: TypeError if some item is not hashable."""
+        if self._fingerprint is None:
+            raise TypeError("unhashable LinkedBST: an item is unhashable")
+        self._frozen = True
+        return self
+
+    def _checkMutable(self):
+        if self._frozen:
+            raise TypeError("The tree is frozen.")
+
+    def _updatePath(self, nodes):
+        """Restores the data subclasses keep in nodes, listed from
+        the root down, after a change below them. A plain tree keeps
+        none."""
+        pass
+
+    def _track(self, item, sign=1):
+        """Adds item to the fingerprint, or takes it out if sign is -1.
+        An unhashable item leaves the fingerprint unknown (None) until
+        the tree is cleared or built again."""
+        if self._fingerprint is None:
+            return
+        try:
+            h = itemHash(item)
+        except TypeError:
+            self._fingerprint = None
+            return
+        self._fingerprint = (self._fingerprint + sign * h) & MASK
+
     def clear(self):
         """Makes self become empty."""
+        self._checkMutable()
         self._root = None
         self._size = 0
+        self._fingerprint = 0
+        self._modCount += 1
 
     def add(self, item):
         """Adds item to the tree."""
-
-        # Helper function to search for item's position
-        def recurse(node):
-            # New item is less, go left until spot is found
-            if item < node.data:
-                if node.left is None:
-                    node.left = BSTNode(item)
-                else:
-                    recurse(node.left)
-            # New item is greater or equal,
-            # go right until spot is found
-            elif node.right is None:
-                node.right = BSTNode(item)
-            else:
-                recurse(node.right)
-                # End of recurse
+        self._checkMutable()
 
         # Tree is empty, so new item goes at the root
         if self.isEmpty():
-            self._root = BSTNode(item)
+            self._root = self._nodeType(item)
         # Otherwise, search for the item's spot
         else:
-            recurse(self._root)
+            node = self._root
+            while True:
+                # New item is less, go left until spot is found
+                if item < node.data:
+                    if node.left is None:
+                        node.left = self._nodeType(item)
+                        break
+                    node = node.left
+                # New item is greater or equal,
+                # go right until spot is found
+                elif node.right is None:
+                    node.right = self._nodeType(item)
+                    break
+                else:
+                    node = node.right
         self._size += 1
+        self._track(item)
+        self._keepExtremes(item, True)
+        self._modCount += 1
 
     def remove(self, item):
         """Precondition: item is in self.
         Raises: KeyError if item is not in self.
         postcondition: item is removed from self."""
+        self._checkMutable()
         if not item in self:
             raise KeyError("Item not in tree.""")
 
@@ -278,21 +407,224 @@ class LinkedBST(AbstractCollection):
         #            Decrement the collection's size counter
         #            Return the item
         self._size -= 1
+        self._track(itemRemoved, -1)
+        self._keepExtremes(itemRemoved, False)
+        self._modCount += 1
         if self.isEmpty():
             self._root = None
         else:
             self._root = preRoot.left
         return itemRemoved
 
+    def remove_if(self, pred):
+        """Removes every item for which pred(item) is true and
+        returns how many were removed. One inorder pass collects
+        the survivors and buildFromSorted rebuilds a balanced tree,
+        so the cost is O(n) however many items go."""
+        self._checkMutable()
+        survivors = list()
+        for item in self._inorderItems():
+            if not pred(item):
+                survivors.append(item)
+        removed = len(self) - len(survivors)
+        if removed:
+            self.buildFromSorted(survivors)
+        return removed
+
+    def retain_if(self, pred):
+        """Removes every item for which pred(item) is false and
+        returns how many were removed, in O(n)."""
+        return self.remove_if(lambda item: not pred(item))
+
+    def remove_all(self, items):
+        """Removes every item equal to one of items and returns
+        how many were removed, in O(n + k log k) for k items."""
+        targets = sorted(items)
+        if not targets:
+            return 0
+        position = 0
+
+        def doomed(item):
+            nonlocal position
+            while position < len(targets) and targets[position] < item:
+                position += 1
+            return position < len(targets) and targets[position] == item
+
+        return self.remove_if(doomed)
+
+    def _extreme(self, smallest):
+        """Returns the smallest (or largest) item, walking the spine
+        only if it is not cached.
+        Raises: KeyError if the tree is empty."""
+        if smallest and self._minStamp == self._modCount:
+            return self._minItem
+        if not smallest and self._maxStamp == self._modCount:
+            return self._maxItem
+        if self.isEmpty():
+            raise KeyError("The tree is empty.")
+        node = self._root
+        if smallest:
+            while node.left is not None:
+                node = node.left
+            self._minItem, self._minStamp = node.data, self._modCount
+        else:
+            while node.right is not None:
+                node = node.right
+            self._maxItem, self._maxStamp = node.data, self._modCount
+        return node.data
+
+    def _keepExtremes(self, item, added):
+        """Carries the cached extremes over a single add or remove
+        of item; the mutator calls it after updating _size and just
+        before bumping _modCount. An added item may become an extreme,
+        and a removed one only drops the extremes it might have been."""
+        stamp = self._modCount
+        if added and self._size == 1:
+            self._minItem = self._maxItem = item
+            self._minStamp = self._maxStamp = stamp + 1
+            return
+        if self._minStamp == stamp:
+            if added and item < self._minItem:
+                self._minItem = item
+            if added or self._minItem < item:
+                self._minStamp = stamp + 1
+        if self._maxStamp == stamp:
+            # equal items go to the right, so the last added is the max
+            if added and not item < self._maxItem:
+                self._maxItem = item
+            if added or item < self._maxItem:
+                self._maxStamp = stamp + 1
+
+    def peek_min(self):
+        """Returns the smallest item, in O(1) once it is cached:
+        adds and removes keep it up to date, other changes drop it.
+        Raises: KeyError if the tree is empty."""
+        return self._extreme(True)
+
+    def peek_max(self):
+        """Returns the largest item, in O(1) once it is cached:
+        adds and removes keep it up to date, other changes drop it.
+        Raises: KeyError if the tree is empty."""
+        return self._extreme(False)
+
+    def _popExtreme(self, smallest):
+        """Unlinks the node of the smallest (or largest) item in
+        one walk down its spine and returns the item. The new extreme,
+        at the next node on the spine or the nearest one below the old,
+        is cached, and the other end stays cached if it was."""
+        self._checkMutable()
+        if self.isEmpty():
+            raise KeyError("The tree is empty.")
+        path = list()
+        node = self._root
+        while (node.left if smallest else node.right) is not None:
+            path.append(node)
+            node = node.left if smallest else node.right
+        child = node.right if smallest else node.left
+        if not path:
+            self._root = child
+        elif smallest:
+            path[-1].left = child
+        else:
+            path[-1].right = child
+        self._updatePath(path)
+        otherKnown = (self._maxStamp if smallest else self._minStamp) == \
+            self._modCount and self._size > 1
+        self._size -= 1
+        self._track(node.data, -1)
+        self._modCount += 1
+        if self.isEmpty():
+            return node.data
+
+        nextNode = child
+        if nextNode is not None:
+            while (nextNode.left if smallest else nextNode.right) \
+                    is not None:
+                nextNode = nextNode.left if smallest else nextNode.right
+        else:
+            nextNode = path[-1]
+        if smallest:
+            self._minItem, self._minStamp = nextNode.data, self._modCount
+            if otherKnown:
+                self._maxStamp = self._modCount
+        else:
+            self._maxItem, self._maxStamp = nextNode.data, self._modCount
+            if otherKnown:
+                self._minStamp = self._modCount
+        return node.data
+
+    def pop_min(self):
+        """Removes and returns the smallest item in O(h), without a
+        separate search.
+        Raises: KeyError if the tree is empty."""
+        return self._popExtreme(True)
+
+    def pop_max(self):
+        """Removes and returns the largest item in O(h), without a
+        separate search.
+        Raises: KeyError if the tree is empty."""
+        return self._popExtreme(False)
+
+    def pop_min_n(self, k):
+        """Removes the k smallest items, or all if there are fewer,
+        and returns them in ascending order, in O(k + h).
+
+        An inorder walk visits the k items, leaving on its stack the
+        ancestors not yet visited. Each of them only loses its left
+        subtree, so relinking every one to the next as its left child,
+        with the unvisited right subtree of the last item at the
+        bottom, leaves exactly the remaining items."""
+        self._checkMutable()
+        found = list()
+        if k <= 0 or self.isEmpty():
+            return found
+        stack = list()
+        node = self._root
+        while len(found) < k and (stack or node is not None):
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            found.append(node.data)
+            node = node.right
+        for parent in reversed(stack):
+            parent.left = node
+            node = parent
+        self._root = node
+        self._updatePath(stack)
+        self._size -= len(found)
+        for item in found:
+            self._track(item, -1)
+        if self._maxStamp == self._modCount and not self.isEmpty():
+            self._maxStamp += 1
+        self._modCount += 1
+        return found
+
+    def push_pop(self, item):
+        """Adds item and then removes and returns the smallest item,
+        like heapq.heappushpop: if item is no larger than every item
+        of the tree it is returned at once and the tree is unchanged.
+        O(h), or O(1) with the smallest item cached."""
+        if self.isEmpty() or not self.peek_min() < item:
+            return item
+        smallest = self.pop_min()
+        self.add(item)
+        return smallest
+
     def replace(self, item, newItem):
         """
         If item is in self, replaces it with newItem and
         returns the old item, or returns None otherwise."""
+        self._checkMutable()
         probe = self._root
         while probe is not None:
             if probe.data == item:
                 oldData = probe.data
                 probe.data = newItem
+                self._track(oldData, -1)
+                self._track(newItem)
+                # a rebuild in progress must not bring oldData back
+                self._modCount += 1
                 return oldData
             elif probe.data > item:
                 probe = probe.left
@@ -345,6 +677,64 @@ class LinkedBST(AbstractCollection):
                 found.append(i)
         return found
 
+    def _outward(self, x):
+        """Returns two cursors, on the largest item < x (or the
+        largest item, if x is above them all) and on the smallest
+        item >= x, with the items under them."""
+        right = self.cursor(x)
+        left = BSTCursor(self)
+        if right.isValid():
+            left.seek(x)
+            leftItem = left.prev()
+        else:
+            leftItem = left.last()
+        return left, leftItem, right, right.item()
+
+    def nearest(self, x, k=1, distance=None):
+        """
+        Returns the k items closest to x, closest first, ties going
+        to the smaller item. x is found once and two cursors move
+        outward from it, so the cost is O(log n + k).
+        :param distance: function of (item, x), abs(item - x) by
+            default; it must grow as items move away from x in order
+        :return: list
+        """
+        if distance is None:
+            distance = lambda item, x: abs(item - x)
+        left, leftItem, right, rightItem = self._outward(x)
+        found = list()
+        while len(found) < k and \
+                (leftItem is not None or rightItem is not None):
+            if rightItem is None or (leftItem is not None and
+                                     distance(leftItem, x) <=
+                                     distance(rightItem, x)):
+                found.append(leftItem)
+                leftItem = left.prev()
+            else:
+                found.append(rightItem)
+                rightItem = right.next()
+        return found
+
+    def within(self, x, radius, distance=None):
+        """
+        Returns the items at most radius away from x, in ascending
+        order, in O(log n + k) for k items found.
+        :param distance: as for nearest
+        :return: list
+        """
+        if distance is None:
+            distance = lambda item, x: abs(item - x)
+        left, leftItem, right, rightItem = self._outward(x)
+        found = list()
+        while leftItem is not None and distance(leftItem, x) <= radius:
+            found.append(leftItem)
+            leftItem = left.prev()
+        found.reverse()
+        while rightItem is not None and distance(rightItem, x) <= radius:
+            found.append(rightItem)
+            rightItem = right.next()
+        return found
+
     def rebalance(self):
         '''
         Rebalances the tree.
@@ -355,16 +745,185 @@ class LinkedBST(AbstractCollection):
         for i in self:
             nodes.append(i)
         nodes.sort()
+        self.buildFromSorted(nodes)
 
-        def helper(tree, nodes, i_start, i_end):
-            if not (i_start+1 < i_end):
-                return
+    def buildFromSorted(self, items):
+        '''
+        Replaces the contents of the tree with a balanced tree
+        built directly from items in O(n), without calling add.
+        :param items: a sequence sorted in ascending order
+        :return:
+        '''
+        self._checkMutable()
+
+        nodeType = self._nodeType
+
+        def build(i_start, i_end):
+            if i_start >= i_end:
+                return None
             middle = (i_start+i_end)//2
-            tree.add(nodes[middle])
-            helper(tree, nodes, middle, i_end)
-            helper(tree, nodes, i_start, middle)
-        self.clear()
-        helper(self, nodes, 0, len(nodes))
+            return nodeType(items[middle],
+                            build(i_start, middle),
+                            build(middle+1, i_end))
+
+        self._root = build(0, len(items))
+        self._size = len(items)
+        build = None  # break the closure cycle that would keep items alive
+        try:
+            fingerprint = sum(map(itemHash, items)) & MASK
+        except TypeError:  # an unhashable item
+            fingerprint = None
+        self._fingerprint = fingerprint
+        self._modCount += 1
+
+    def cursor(self, item=None):
+        '''
+        Returns a BSTCursor positioned on the smallest item >= item,
+        or on the smallest item of the tree if item is None.
+        :param item:
+        :return: BSTCursor
+        '''
+        cursor = BSTCursor(self)
+        if item is None:
+            cursor.first()
+        else:
+            cursor.seek(item)
+        return cursor
+
+    # Asynchronous methods: each gives the event loop a turn every
+    # asyncChunk nodes, and rebuilds run in an executor, so that
+    # maintenance of a large tree does not stall other coroutines
+    async def ainorder(self, chunk=None):
+        """Supports an inorder traversal with async for.
+        Raises: RuntimeError if the tree changes meanwhile."""
+        chunk = chunk or self.asyncChunk
+        modCount = self._modCount
+        count = 0
+        for item in self._inorderItems():
+            yield item
+            count += 1
+            if count % chunk == 0:
+                await asyncio.sleep(0)
+            if modCount != self._modCount:
+                raise RuntimeError("Tree changed during iteration.")
+
+    def __aiter__(self):
+        return self.ainorder()
+
+    async def aheight(self, chunk=None):
+        """Returns the height of the tree, like height.
+        Raises: RuntimeError if the tree changes meanwhile."""
+        chunk = chunk or self.asyncChunk
+        modCount = self._modCount
+        height = -1
+        stack = [(self._root, 0)] if self._root is not None else []
+        count = 0
+        while stack:
+            node, depth = stack.pop()
+            if depth > height:
+                height = depth
+            if node.left is not None:
+                stack.append((node.left, depth + 1))
+            if node.right is not None:
+                stack.append((node.right, depth + 1))
+            count += 1
+            if count % chunk == 0:
+                await asyncio.sleep(0)
+                if modCount != self._modCount:
+                    raise RuntimeError("Tree changed during height.")
+        return height
+
+    async def arangeFind(self, low, high, chunk=None):
+        """Returns a sorted list of the items where low <= item <= high,
+        visiting only the subtrees that may hold them.
+        Raises: RuntimeError if the tree changes meanwhile."""
+        chunk = chunk or self.asyncChunk
+        modCount = self._modCount
+        found = list()
+        stack = list()
+        node = self._root
+        count = 0
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left if low <= node.data else None
+            node = stack.pop()
+            if high < node.data:
+                break
+            if low <= node.data:
+                found.append(node.data)
+            node = node.right
+            count += 1
+            if count % chunk == 0:
+                await asyncio.sleep(0)
+                if modCount != self._modCount:
+                    raise RuntimeError("Tree changed during rangeFind.")
+        return found
+
+    def _built(self, items, extra):
+        """Returns a new balanced tree of the sorted items merged
+        with the sorted extra. Runs in an executor."""
+        tree = type(self)()
+        tree.buildFromSorted(list(merge(items, extra)) if extra else items)
+        return tree
+
+    async def _arebuild(self, extra, executor, chunk, retries):
+        """Rebuilds self balanced, with the sorted extra added, from
+        a snapshot taken in chunks and built in executor. If the tree
+        changes before the new one is ready, starts over, at most
+        retries times.
+        Raises: TypeError if the tree is or gets frozen."""
+        self._checkMutable()
+        loop = asyncio.get_running_loop()
+        for attempt in range(retries + 1):
+            modCount = self._modCount
+            try:
+                items = [item async for item in self.ainorder(chunk)]
+            except RuntimeError:
+                continue
+            tree = await loop.run_in_executor(executor, self._built,
+                                              items, extra)
+            # the tree may have been frozen while it was being built
+            self._checkMutable()
+            if modCount == self._modCount:
+                # the old nodes are freed in executor too, as
+                # dropping the last reference to a big tree takes long
+                garbage = [self._root]
+                self._root = tree._root
+                self._size = tree._size
+                self._fingerprint = tree._fingerprint
+                self._modCount += 1
+                del tree
+                await loop.run_in_executor(executor, garbage.clear)
+                return
+        raise RuntimeError("Tree kept changing during the rebuild.")
+
+    async def arebalance(self, executor=None, chunk=None, retries=3):
+        """Rebalances the tree, building the new one in executor (the
+        loop's default one if None) from a snapshot of the items.
+        Raises: RuntimeError if the tree changes during every try."""
+        await self._arebuild([], executor, chunk, retries)
+
+    async def aload(self, items, executor=None, chunk=None, retries=3):
+        """Adds items, an iterable or async iterable, leaving the
+        tree balanced: the items are collected in chunks, then sorted,
+        merged with the tree's and built in executor. Returns the
+        number of items added."""
+        self._checkMutable()
+        chunk = chunk or self.asyncChunk
+        batch = list()
+        if hasattr(items, '__aiter__'):
+            async for item in items:
+                batch.append(item)
+        else:
+            for item in items:
+                batch.append(item)
+                if len(batch) % chunk == 0:
+                    await asyncio.sleep(0)
+        loop = asyncio.get_running_loop()
+        batch = await loop.run_in_executor(executor, _sortInRuns, batch)
+        await self._arebuild(batch, executor, chunk, retries)
+        return len(batch)
 
     def successor(self, item):
         """
@@ -24,6 +24,13 @@ class LinkedQueue(AbstractCollection):
             yield cursor.data
             cursor = cursor.next
         
+    def _nodes(self):
+        """Supports iteration over the nodes of self."""
+        node = self._front
+        while node is not None:
+            yield node
+            node = node.next
+
     def peek(self):
         """
         Returns the item at the front of the queue.
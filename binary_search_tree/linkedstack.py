@@ -18,18 +18,23 @@ class LinkedStack(AbstractStack):
 
     # Accessor methods
     def __iter__(self):
-        """Supports iteration over a view of self."""
-        
-        def visitNodes(node):
-            """Adds items to tempList from tail to head."""
-            if not node is None:
-                visitNodes(node.next)
-                tempList.append(node.data)
-                
-        tempList = list()                
-        visitNodes(self._items)
+        """Supports iteration over a view of self,
+        from bottom to top."""
+        tempList = list()
+        node = self._items
+        while node is not None:
+            tempList.append(node.data)
+            node = node.next
+        tempList.reverse()
         return iter(tempList)
 
+    def _nodes(self):
+        """Supports iteration over the nodes of self."""
+        node = self._items
+        while node is not None:
+            yield node
+            node = node.next
+
     def peek(self):
         """
         Returns the item at the top of the stack.
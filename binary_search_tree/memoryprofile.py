@@ -0,0 +1,159 @@
+"""
+File: memoryprofile.py
+
+Memory footprint measurement for the collections of this package.
+memory_report() on a collection estimates its size from the shapes
+of its objects; memory_benchmark() measures what building each
+collection really allocates with tracemalloc.
+"""
+
+import sys
+import tracemalloc
+
+
+_instanceSizes = dict()
+
+
+def traced_build(build):
+    '''
+    Call build() and return (result, bytes it left allocated),
+    as seen by tracemalloc. Works whether or not tracing is on.
+    '''
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    if not tracing:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def instance_bytes(obj, samples=256):
+    '''
+    Return the bytes taken by an object shaped like obj, attribute
+    storage included but attribute values excluded. Measured once
+    per type; looking at obj.__dict__ directly would materialize a
+    dict on objects that keep their attributes inline.
+    '''
+    objType = type(obj)
+    if objType not in _instanceSizes:
+        names = getattr(objType, '__slots__', None)
+        if names is None:
+            names = list(vars(obj))
+        fields = [(name, getattr(obj, name)) for name in names]
+
+        def build():
+            copies = list()
+            for _ in range(samples):
+                clone = objType.__new__(objType)
+                for name, value in fields:
+                    setattr(clone, name, value)
+                copies.append(clone)
+            return copies
+
+        copies, allocated = traced_build(build)
+        _instanceSizes[objType] = (allocated - sys.getsizeof(copies)) \
+            // samples
+    return _instanceSizes[objType]
+
+
+def memory_report(collection):
+    '''
+    Return a dict describing the memory used by collection:
+    elements, nodes, key_bytes (every distinct key once),
+    structure_bytes (the collection object, its nodes and buffers),
+    total_bytes and the per-element figures of both.
+    '''
+    structure = instance_bytes(collection)
+    nodes = 0
+    seen = set()
+    keyBytes = 0
+
+    def countKey(key):
+        nonlocal keyBytes
+        if id(key) not in seen:
+            seen.add(id(key))
+            keyBytes += sys.getsizeof(key)
+
+    for node in collection._nodes():
+        nodes += 1
+        structure += instance_bytes(node)
+        countKey(node.data)
+    for buffer in collection._buffers():
+        structure += sys.getsizeof(buffer)
+        for key in buffer:
+            if key is not None:
+                countKey(key)
+
+    elements = len(collection)
+    perElement = max(elements, 1)
+    return {'type': type(collection).__name__,
+            'elements': elements,
+            'nodes': nodes,
+            'key_bytes': keyBytes,
+            'structure_bytes': structure,
+            'total_bytes': keyBytes + structure,
+            'structure_per_element': structure / perElement,
+            'bytes_per_element': (keyBytes + structure) / perElement}
+
+
+def default_factories():
+    '''Return name -> function building each collection from items'''
+    from linkedbst import LinkedBST
+    from linkedstack import LinkedStack
+    from linkedqueue import LinkedQueue
+    from arraystack import ArrayStack
+    from arrayqueue import ArrayQueue
+
+    def balancedBST(items):
+        tree = LinkedBST()
+        tree.buildFromSorted(sorted(items))
+        return tree
+
+    return {'LinkedBST': LinkedBST,
+            'LinkedBST (bulk)': balancedBST,
+            'LinkedStack': LinkedStack,
+            'LinkedQueue': LinkedQueue,
+            'ArrayStack': ArrayStack,
+            'ArrayQueue': ArrayQueue}
+
+
+def memory_benchmark(items, factories=None):
+    '''
+    Build every collection from items under tracemalloc and return
+    a list of (name, traced bytes per element, memory_report).
+    The items themselves exist beforehand, so the traced bytes are
+    the structural overhead only.
+    '''
+    if factories is None:
+        factories = default_factories()
+    results = list()
+    for name, factory in factories.items():
+        collection, allocated = traced_build(lambda: factory(items))
+        results.append((name, allocated / max(len(items), 1),
+                        memory_report(collection)))
+    return results
+
+
+def format_benchmark(results):
+    '''Return the results of memory_benchmark as a table'''
+    lines = ['{:>18} {:>9} {:>8} {:>12} {:>12} {:>12}'.format(
+        'collection', 'elements', 'nodes', 'traced B/el',
+        'struct B/el', 'total B/el')]
+    for name, traced, report in results:
+        lines.append('{:>18} {:>9} {:>8} {:>12.1f} {:>12.1f} {:>12.1f}'
+                     .format(name, report['elements'], report['nodes'],
+                             traced, report['structure_per_element'],
+                             report['bytes_per_element']))
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    from random import shuffle
+    from keyloader import iter_keys
+
+    words = list(iter_keys('words.txt'))
+    shuffle(words)
+    print(format_benchmark(memory_benchmark(words)))
@@ -1,13 +1,13 @@
-from random import shuffle, choice
+from random import shuffle, sample
 from linkedbst import LinkedBST as Tree
+from keyloader import iter_keys
+from memoryprofile import memory_benchmark, format_benchmark
 from time import time
 
 
 def load_words(path):
-    '''Return a list of words loaded from file'''
-    with open(path) as file:
-        words = file.readlines()
-    return words
+    '''Return a list of words loaded from file, without newlines'''
+    return list(iter_keys(path))
 
 
 def test_tree_find(data: Tree, items):
@@ -80,8 +80,7 @@ def all_test(sorted_words, n=1000):
 def total_test(n=20) -> tuple:
     '''Run test multiple times, return average time'''
     sorted_words = load_words('words.txt')
-    shuffle(sorted_words)
-    sorted_words = sorted_words[:500]  # Tree objects can't be too large
+    sorted_words = sample(sorted_words, 500)  # Tree objects can't be too large
     sorted_words.sort()
     timeA, timeB, timeC, timeD = 0, 0, 0, 0
     for i in range(n):
@@ -107,3 +106,6 @@ if __name__ == '__main__':
 словника який не впорядкований за абеткою:', timeC)
     print('\td) у словнику, який представлений у вигляді збалансованого \
 бінарного дерева пошуку:', timeD)
+    print('\nвикористання пам\'яті (байтів на елемент):\n')
+    print(format_benchmark(memory_benchmark(sample(load_words('words.txt'),
+                                                   10000))))
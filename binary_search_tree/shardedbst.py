@@ -0,0 +1,276 @@
+"""
+File: shardedbst.py
+
+A binary search tree split by key range across worker processes.
+Every shard is a LinkedBST living in its own process; batched
+operations are partitioned by split points, sent to all shards
+at once and merged back in key order.
+"""
+
+from abstractcollection import AbstractCollection
+from linkedbst import LinkedBST
+from bisect import bisect_right
+from heapq import merge
+from itertools import takewhile
+from multiprocessing import Process, Pipe, cpu_count
+from random import sample as randomSample
+
+
+def _serve(conn):
+    """Owns one shard: answers (operation, argument) requests
+    sent through conn until it receives 'close'."""
+    tree = LinkedBST()
+    while True:
+        op, arg = conn.recv()
+        try:
+            if op == 'add':
+                arg.sort()
+                if len(arg) >= len(tree):
+                    # Merging and rebuilding is O(n) and keeps
+                    # the shard balanced for large batches
+                    tree.buildFromSorted(
+                        list(merge(tree._inorderItems(), arg)))
+                else:
+                    for item in arg:
+                        tree.add(item)
+                result = len(tree)
+            elif op == 'find':
+                result = [tree.find(item) for item in arg]
+            elif op == 'range':
+                low, high = arg
+                result = list(takewhile(lambda item: item <= high,
+                                        tree.cursor(low)))
+            elif op == 'remove':
+                result = tree.remove(arg)
+            elif op == 'items':
+                result = list(tree._inorderItems())
+            elif op == 'clear':
+                result = tree.clear()
+            elif op == 'close':
+                conn.send((True, None))
+                break
+            else:
+                raise ValueError('Unknown operation: ' + str(op))
+            conn.send((True, result))
+        except Exception as error:
+            conn.send((False, error))
+    conn.close()
+
+
+def splitPoints(sample, shards):
+    """Returns at most shards - 1 distinct split points taken at
+    evenly spaced quantiles of sample."""
+    ordered = sorted(sample)
+    points = list()
+    for i in range(1, shards):
+        if not ordered:
+            break
+        point = ordered[len(ordered) * i // shards]
+        if not points or points[-1] < point:
+            points.append(point)
+    return points
+
+
+class ShardedBST(AbstractCollection):
+    """A range-partitioned binary search tree whose shards run
+    in separate processes."""
+
+    def __init__(self, sourceCollection=None, shards=None,
+                 sample=None, sampleSize=10000):
+        """Sets the initial state of self. Split points are taken
+        from sample or, if it is absent, from a random sample of
+        sourceCollection; without either there is a single shard."""
+        if shards is None:
+            shards = cpu_count()
+        if sourceCollection is not None:
+            sourceCollection = list(sourceCollection)
+        if sample is None and sourceCollection:
+            sample = randomSample(sourceCollection,
+                                  min(sampleSize, len(sourceCollection)))
+        self._splits = splitPoints(sample or [], shards)
+        self._conns = list()
+        self._workers = list()
+        for _ in range(len(self._splits) + 1):
+            parentConn, childConn = Pipe()
+            worker = Process(target=_serve, args=(childConn,), daemon=True)
+            worker.start()
+            childConn.close()
+            self._conns.append(parentConn)
+            self._workers.append(worker)
+        AbstractCollection.__init__(self)
+        if sourceCollection:
+            self.addAll(sourceCollection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def shardCount(self):
+        """Returns the number of shards."""
+        return len(self._conns)
+
+    def _shardOf(self, item):
+        return bisect_right(self._splits, item)
+
+    def _partition(self, items):
+        """Returns a list of (shard, positions, items) triples for
+        the non-empty parts of items."""
+        parts = [[] for _ in self._conns]
+        positions = [[] for _ in self._conns]
+        for position, item in enumerate(items):
+            shard = self._shardOf(item)
+            parts[shard].append(item)
+            positions[shard].append(position)
+        return [(shard, positions[shard], parts[shard])
+                for shard in range(len(parts)) if parts[shard]]
+
+    def _call(self, requests):
+        """Sends (shard, operation, argument) requests to all their
+        shards first, then collects the replies in the same order."""
+        for shard, op, arg in requests:
+            self._conns[shard].send((op, arg))
+        replies = list()
+        error = None
+        for shard, op, arg in requests:
+            ok, result = self._conns[shard].recv()
+            if not ok and error is None:
+                error = result
+            replies.append(result)
+        if error is not None:
+            raise error
+        return replies
+
+    # Accessor methods
+    def __iter__(self):
+        """Supports an inorder traversal on a view of self."""
+        shards = range(len(self._conns))
+        for items in self._call([(i, 'items', None) for i in shards]):
+            for item in items:
+                yield item
+
+    def inorder(self):
+        """Supports an inorder traversal on a view of self."""
+        return iter(self)
+
+    def __contains__(self, item):
+        """Returns True if target is found or False otherwise."""
+        return self.find(item) is not None
+
+    def find(self, item):
+        """If item matches an item in self, returns the
+        matched item, or None otherwise."""
+        return self.findAll([item])[0]
+
+    def findAll(self, items):
+        """Returns a list with the result of find for every item,
+        looking the items up in all shards in parallel."""
+        results = [None] * len(items)
+        parts = self._partition(items)
+        replies = self._call([(shard, 'find', part)
+                              for shard, _, part in parts])
+        for (_, positions, _), found in zip(parts, replies):
+            for position, item in zip(positions, found):
+                results[position] = item
+        return results
+
+    def rangeFind(self, low, high):
+        """Returns a sorted list of the items in self, where
+        low <= item <= high. Only shards overlapping the range
+        are asked."""
+        if high < low:
+            return list()
+        shards = range(self._shardOf(low), self._shardOf(high) + 1)
+        found = list()
+        for items in self._call([(i, 'range', (low, high))
+                                 for i in shards]):
+            found.extend(items)
+        return found
+
+    # Mutator methods
+    def add(self, item):
+        """Adds item to self."""
+        self.addAll([item])
+
+    def addAll(self, items):
+        """Adds all items to self, building the shards in parallel."""
+        parts = self._partition(items)
+        self._call([(shard, 'add', part) for shard, _, part in parts])
+        self._size += sum(len(part) for _, _, part in parts)
+
+    def remove(self, item):
+        """Precondition: item is in self.
+        Raises: KeyError if item is not in self.
+        postcondition: item is removed from self."""
+        removed = self._call([(self._shardOf(item), 'remove', item)])[0]
+        self._size -= 1
+        return removed
+
+    def clear(self):
+        """Makes self become empty."""
+        self._call([(i, 'clear', None) for i in range(len(self._conns))])
+        self._size = 0
+
+    def close(self):
+        """Stops the shard processes. Self is unusable afterwards."""
+        if not self._conns:
+            return
+        self._call([(i, 'close', None) for i in range(len(self._conns))])
+        for conn, worker in zip(self._conns, self._workers):
+            conn.close()
+            worker.join()
+        self._conns = list()
+        self._workers = list()
+
+
+def benchmark(nKeys=1000000, nFinds=200000, shardCounts=None):
+    """Times bulk add, batched find and a wide rangeFind of a single
+    LinkedBST against ShardedBSTs with a growing number of shards.
+    Returns a list of (shards, addTime, findTime, rangeTime)."""
+    from random import shuffle, choice
+    from time import time
+
+    keys = list(range(nKeys))
+    shuffle(keys)
+    probes = [choice(keys) for _ in range(nFinds)]
+    if shardCounts is None:
+        shardCounts = [1]
+        while shardCounts[-1] * 2 <= cpu_count():
+            shardCounts.append(shardCounts[-1] * 2)
+
+    results = list()
+    start = time()
+    tree = LinkedBST()
+    tree.buildFromSorted(sorted(keys))
+    addTime = time() - start
+    start = time()
+    for item in probes:
+        tree.find(item)
+    findTime = time() - start
+    start = time()
+    sorted(tree.rangeFind(nKeys // 4, nKeys // 2))
+    results.append((0, addTime, findTime, time() - start))
+
+    for shards in shardCounts:
+        with ShardedBST(shards=shards, sample=keys[:10000]) as sharded:
+            start = time()
+            sharded.addAll(keys)
+            addTime = time() - start
+            start = time()
+            sharded.findAll(probes)
+            findTime = time() - start
+            start = time()
+            sharded.rangeFind(nKeys // 4, nKeys // 2)
+            results.append((shards, addTime, findTime, time() - start))
+    return results
+
+
+if __name__ == '__main__':
+    import sys
+
+    nKeys = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print('shards      add     find    range   (0 = single LinkedBST)')
+    for shards, addTime, findTime, rangeTime in benchmark(nKeys, nKeys // 5):
+        print('{:6} {:8.3f} {:8.3f} {:8.3f}'.format(
+            shards, addTime, findTime, rangeTime))
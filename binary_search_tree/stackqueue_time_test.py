@@ -0,0 +1,57 @@
+from linkedstack import LinkedStack
+from linkedqueue import LinkedQueue
+from arraystack import ArrayStack
+from arrayqueue import ArrayQueue
+from time import perf_counter
+
+
+def time_fill_drain(collection, n):
+    '''Add n items to an empty collection, iterate over it once and
+    pop them all; return the seconds taken by each step'''
+    start = perf_counter()
+    for i in range(n):
+        collection.add(i)
+    filled = perf_counter()
+    for _ in collection:
+        pass
+    iterated = perf_counter()
+    for _ in range(n):
+        collection.pop()
+    drained = perf_counter()
+    return filled - start, iterated - filled, drained - iterated
+
+
+def time_steady(collection, n, size=1000):
+    '''Keep size items in collection while doing n add/pop pairs;
+    return the seconds taken'''
+    for i in range(size):
+        collection.add(i)
+    start = perf_counter()
+    for i in range(n):
+        collection.add(i)
+        collection.pop()
+    return perf_counter() - start
+
+
+def total_test(sizes=(10000, 100000, 1000000)):
+    '''Return rows of (kind, n, linked seconds, array seconds)'''
+    rows = []
+    for linked, array in ((LinkedStack, ArrayStack),
+                          (LinkedQueue, ArrayQueue)):
+        for n in sizes:
+            linkedTimes = time_fill_drain(linked(), n)
+            arrayTimes = time_fill_drain(array(), n)
+            for step, a, b in zip(('add', 'iterate', 'pop'),
+                                  linkedTimes, arrayTimes):
+                rows.append((array.__name__ + ' ' + step, n, a, b))
+            rows.append((array.__name__ + ' steady', n,
+                         time_steady(linked(), n), time_steady(array(), n)))
+    return rows
+
+
+if __name__ == '__main__':
+    print('{:>22} {:>9} {:>10} {:>10} {:>8}'.format(
+        'operation', 'n', 'linked s', 'array s', 'speedup'))
+    for name, n, linkedTime, arrayTime in total_test():
+        print('{:>22} {:>9} {:>10.4f} {:>10.4f} {:>8.2f}'.format(
+            name, n, linkedTime, arrayTime, linkedTime / arrayTime))
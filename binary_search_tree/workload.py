@@ -0,0 +1,218 @@
+"""
+File: workload.py
+
+Mixed-workload generator and replay harness for tree engines.
+A workload is a list of operations:
+    ('add', key), ('remove', key), ('find', key), ('range', low, high)
+It can be written to and read back from a plain text trace, and
+replayed against any BSTInterface implementation while every result
+is cross-checked against a sorted-list model.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from random import Random
+from time import perf_counter_ns
+from linkedbst import LinkedBST
+
+
+DEFAULT_MIX = {'add': 0.3, 'remove': 0.1, 'find': 0.5, 'range': 0.1}
+
+
+def key_sampler(distribution, keySpace, rng, zipfS=1.1):
+    '''
+    Return a function that draws keys from range(keySpace).
+    :param distribution: 'uniform', 'zipf' or 'sequential'
+    :param zipfS: exponent of the Zipf distribution; the hot keys
+                  are scattered over the key space, not bunched at 0
+    '''
+    if distribution == 'uniform':
+        return lambda: rng.randrange(keySpace)
+    if distribution == 'sequential':
+        counter = [-1]
+
+        def sequential():
+            counter[0] = (counter[0] + 1) % keySpace
+            return counter[0]
+        return sequential
+    if distribution == 'zipf':
+        keys = list(range(keySpace))
+        rng.shuffle(keys)
+        cumulative = list()
+        total = 0
+        for rank in range(1, keySpace + 1):
+            total += rank ** -zipfS
+            cumulative.append(total)
+        return lambda: keys[min(bisect_left(cumulative, rng.random() * total),
+                                keySpace - 1)]
+    raise ValueError('Unknown key distribution: ' + str(distribution))
+
+
+def generate_workload(nOps, mix=None, keys='uniform', keySpace=100000,
+                      rangeWidth=100, seed=0, zipfS=1.1):
+    '''
+    Return a list of nOps operations.
+    :param mix: dict mapping operation name to its relative weight
+    :param keys: key distribution, see key_sampler
+    :param rangeWidth: largest high - low of a range operation
+    :param seed: the same seed always gives the same workload
+    '''
+    if mix is None:
+        mix = DEFAULT_MIX
+    rng = Random(seed)
+    nextKey = key_sampler(keys, keySpace, rng, zipfS)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    ops = list()
+    for name in rng.choices(names, weights, k=nOps):
+        key = nextKey()
+        if name == 'range':
+            ops.append((name, key, key + rng.randrange(rangeWidth + 1)))
+        elif name in ('add', 'remove', 'find'):
+            ops.append((name, key))
+        else:
+            raise ValueError('Unknown operation: ' + str(name))
+    return ops
+
+
+def write_trace(path, ops):
+    '''Write operations to a text trace, one per line'''
+    with open(path, 'w') as file:
+        for op in ops:
+            file.write(' '.join(map(str, op)) + '\n')
+
+
+def read_trace(path):
+    '''Yield the operations of a trace written by write_trace'''
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if fields:
+                yield (fields[0],) + tuple(int(field) for field in fields[1:])
+
+
+class SortedListModel(object):
+    """Reference model of a binary search tree on a sorted list."""
+
+    def __init__(self):
+        self._items = list()
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item):
+        insort(self._items, item)
+
+    def remove(self, item):
+        i = bisect_left(self._items, item)
+        if i == len(self._items) or self._items[i] != item:
+            raise KeyError("Item not in tree.")
+        return self._items.pop(i)
+
+    def find(self, item):
+        i = bisect_left(self._items, item)
+        if i < len(self._items) and self._items[i] == item:
+            return self._items[i]
+        return None
+
+    def rangeFind(self, low, high):
+        return self._items[bisect_left(self._items, low):
+                           bisect_right(self._items, high)]
+
+
+def _apply(tree, op):
+    """Runs op against tree and returns its outcome."""
+    name = op[0]
+    if name == 'add':
+        tree.add(op[1])
+        return None
+    if name == 'remove':
+        try:
+            return tree.remove(op[1])
+        except KeyError:
+            return KeyError
+    if name == 'find':
+        return tree.find(op[1])
+    return sorted(tree.rangeFind(op[1], op[2]))
+
+
+def percentile(ordered, p):
+    '''Return the p-th percentile of an ascending list'''
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class ReplayReport(object):
+    """Throughput, latency percentiles and mismatches of a replay."""
+
+    def __init__(self, latencies, mismatches, size):
+        self.latencies = latencies  # operation name -> list of ns
+        self.mismatches = mismatches  # (index, op, got, expected)
+        self.size = size
+        self.operations = sum(len(times) for times in latencies.values())
+        self.seconds = sum(sum(times) for times in latencies.values()) / 1e9
+
+    def throughput(self):
+        '''Return operations per second spent inside the tree'''
+        return self.operations / self.seconds if self.seconds else 0
+
+    def summary(self, percentiles=(50, 90, 99)):
+        '''Return a dict: operation -> (count, p50, p90, ..., max) in us'''
+        result = dict()
+        for name, times in self.latencies.items():
+            ordered = sorted(times)
+            result[name] = (len(ordered),) + tuple(
+                percentile(ordered, p) / 1000 for p in percentiles) + \
+                (ordered[-1] / 1000,)
+        return result
+
+    def __str__(self):
+        lines = ['{} ops in {:.3f} s, {:.0f} ops/s, final size {}, '
+                 '{} mismatches'.format(self.operations, self.seconds,
+                                        self.throughput(), self.size,
+                                        len(self.mismatches)),
+                 '{:>8} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+                     'op', 'count', 'p50 us', 'p90 us', 'p99 us', 'max us')]
+        for name, row in sorted(self.summary().items()):
+            lines.append('{:>8} {:>9} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}'
+                         .format(name, *row))
+        return '\n'.join(lines)
+
+
+def replay(ops, tree=None, check=True, maxMismatches=100):
+    '''
+    Replay operations against tree (a new LinkedBST by default)
+    and return a ReplayReport. Only the tree's own calls are timed;
+    with check, every outcome is compared with SortedListModel.
+    '''
+    if tree is None:
+        tree = LinkedBST()
+    model = SortedListModel() if check else None
+    latencies = dict()
+    mismatches = list()
+    for index, op in enumerate(ops):
+        start = perf_counter_ns()
+        got = _apply(tree, op)
+        elapsed = perf_counter_ns() - start
+        latencies.setdefault(op[0], []).append(elapsed)
+        if model is not None:
+            expected = _apply(model, op)
+            if got != expected and len(mismatches) < maxMismatches:
+                mismatches.append((index, op, got, expected))
+    if model is not None and len(tree) != len(model):
+        mismatches.append((len(ops), ('len',), len(tree), len(model)))
+    return ReplayReport(latencies, mismatches, len(tree))
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+    from tempfile import gettempdir
+
+    nOps = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for keys in ('uniform', 'zipf', 'sequential'):
+        path = os.path.join(gettempdir(), 'trace_{}.txt'.format(keys))
+        write_trace(path, generate_workload(nOps, keys=keys,
+                                            keySpace=nOps // 2))
+        print('\n' + path)
+        print(replay(read_trace(path)))
@@ -0,0 +1,175 @@
+'''Many 3x3 boards at once as NumPy arrays
+
+A BoardBatch holds N positions as an (N, 9) int8 array, cell (i, j) in
+column 3*i+j, 0 for empty, 1 for X and 2 for O, so a row read as a
+base-3 number is the index Board.key() gives. Status (winner, draw,
+game over), legal-move masks, moves and random playouts are computed
+for all rows at once with array operations, with no Python loop over
+the boards.
+'''
+import numpy as np
+from bitboard import WIN_MASKS
+
+
+EMPTY, X, O = 0, 1, 2
+
+# LINES[l] are the three cells of winning line l
+LINES = np.array([[n for n in range(9) if mask >> n & 1]
+                  for mask in WIN_MASKS], dtype=np.intp)
+POWERS = 3 ** np.arange(9, dtype=np.int64)
+BITS = 1 << np.arange(9, dtype=np.int64)
+
+
+class BoardBatch:
+    '''N tic-tac-toe positions, played on together'''
+
+    def __init__(self, n=0, cells=None):
+        if cells is None:
+            cells = np.zeros((n, 9), dtype=np.int8)
+        self.cells = np.ascontiguousarray(cells, dtype=np.int8)
+
+    @classmethod
+    def from_indexes(cls, indexes):
+        '''Return the batch of the positions with base-3 indexes'''
+        indexes = np.asarray(indexes, dtype=np.int64)
+        return cls(cells=indexes[:, None] // POWERS % 3)
+
+    @classmethod
+    def from_boards(cls, boards):
+        '''Return the batch of the positions of Board objects'''
+        return cls.from_indexes([board.key() for board in boards])
+
+    def __len__(self):
+        return len(self.cells)
+
+    def copy(self):
+        return BoardBatch(cells=self.cells.copy())
+
+    def indexes(self):
+        '''Return the base-3 index of every position'''
+        return self.cells.astype(np.int64) @ POWERS
+
+    def n_moves(self):
+        return np.count_nonzero(self.cells, axis=1)
+
+    def to_move(self):
+        '''Return the symbol, X or O, of the side to move on every board'''
+        return np.where(self.n_moves() % 2, O, X).astype(np.int8)
+
+    def winners(self):
+        '''Return X, O or EMPTY (no winner yet) for every board'''
+        lines = self.cells[:, LINES]  # (N, 8, 3)
+        x_won = (lines == X).all(axis=2).any(axis=1)
+        o_won = (lines == O).all(axis=2).any(axis=1)
+        return np.where(x_won, X, np.where(o_won, O, EMPTY)).astype(np.int8)
+
+    def status(self):
+        '''Return (winners, draws, game_over) as arrays'''
+        winners = self.winners()
+        full = self.n_moves() == 9
+        draws = full & (winners == EMPTY)
+        return winners, draws, full | (winners != EMPTY)
+
+    def game_over(self):
+        return self.status()[2]
+
+    def legal_mask(self):
+        '''Return an (N, 9) bool array of the cells each board may
+        play, none on boards whose game is over'''
+        return (self.cells == EMPTY) & ~self.game_over()[:, None]
+
+    def legal_bits(self):
+        '''Return the legal moves of every board as a 9-bit mask, bit
+        3*i+j for cell (i, j) as in bitboard.py'''
+        return self.legal_mask() @ BITS
+
+    def apply(self, moves):
+        '''Play cell moves[r] on board r for every r, a negative move
+        leaving the board as it is; raise ValueError if a move is not
+        legal'''
+        moves = np.asarray(moves, dtype=np.intp)
+        rows = np.flatnonzero(moves >= 0)
+        cols = moves[rows]
+        if np.any(cols > 8) or not self.legal_mask()[rows, cols].all():
+            raise ValueError('Invalid move')
+        self.cells[rows, cols] = self.to_move()[rows]
+
+    def children(self):
+        '''Return (batch, parents, moves): every position one legal move
+        away from a board of this batch, the row it came from and the
+        cell played'''
+        parents, moves = np.nonzero(self.legal_mask())
+        cells = self.cells[parents]
+        cells[np.arange(len(parents)), moves] = self.to_move()[parents]
+        return BoardBatch(cells=cells), parents, moves
+
+    def random_moves(self, rng):
+        '''Return a uniformly random legal cell for every board, -1 where
+        the game is over'''
+        legal = self.legal_mask()
+        scores = rng.random(legal.shape)
+        scores[~legal] = -1
+        moves = scores.argmax(axis=1)
+        moves[~legal.any(axis=1)] = -1
+        return moves
+
+    def playout(self, rng=None):
+        '''Play random moves on every board until all games are over and
+        return the winners'''
+        if rng is None:
+            rng = np.random.default_rng()
+        while True:
+            moves = self.random_moves(rng)
+            if np.all(moves < 0):
+                return self.winners()
+            self.apply(moves)
+
+
+def benchmark(n=200000, seed=0):
+    '''Check the batch against Board on random games and compare the
+    speed of random playouts from the empty board'''
+    from board import Board
+    from random import Random
+    from time import perf_counter
+
+    rng = Random(seed)
+    keys, winners, over = [], [], []
+    board = Board()
+    for _ in range(2000):
+        board.clear()
+        while True:
+            keys.append(board.key())
+            winner = board.winner()
+            winners.append(X if winner == 'X' else O if winner == 'O'
+                           else EMPTY)
+            over.append(board.game_over())
+            if board.game_over():
+                break
+            board.push(rng.choice(board.empty_cells()))
+    batch = BoardBatch.from_indexes(keys)
+    assert np.array_equal(batch.indexes(), keys)
+    assert np.array_equal(batch.winners(), winners)
+    assert np.array_equal(batch.game_over(), over)
+    print(f'{len(keys)} positions agree with Board')
+
+    start = perf_counter()
+    results = BoardBatch(n).playout(np.random.default_rng(seed))
+    elapsed = perf_counter() - start
+    print(f'batch: {n} playouts in {elapsed:.3f} s, '
+          f'{n / elapsed:.0f} games/s; X {np.mean(results == X):.3f} '
+          f'O {np.mean(results == O):.3f} draw '
+          f'{np.mean(results == EMPTY):.3f}')
+
+    games = n // 20
+    start = perf_counter()
+    for _ in range(games):
+        board.clear()
+        while not board.game_over():
+            board.push(rng.choice(board.empty_cells()))
+    elapsed = perf_counter() - start
+    print(f'Board: {games} playouts in {elapsed:.3f} s, '
+          f'{games / elapsed:.0f} games/s')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,98 @@
+x = 'X'
+o = 'O'
+
+# cell (i, j) is bit 3*i + j
+CELLS = [(i, j) for i in range(3) for j in range(3)]
+BIT = {cell: 1 << n for n, cell in enumerate(CELLS)}
+FULL = (1 << 9) - 1
+
+# base-3 weight of each 9-bit mask: X is digit 1, O is digit 2
+TERNARY = [sum(3 ** n for n in range(9) if mask >> n & 1)
+           for mask in range(1 << 9)]
+
+WIN_MASKS = [0b000000111, 0b000111000, 0b111000000,  # rows
+             0b001001001, 0b010010010, 0b100100100,  # columns
+             0b100010001, 0b001010100]               # diagonals
+
+
+# the winning lines through each cell, by bit number
+LINES_THROUGH = [[mask for mask in WIN_MASKS if mask >> n & 1]
+                 for n in range(9)]
+
+
+def bit_cells(mask):
+    '''Return the cells of the set bits of mask, lowest bit first'''
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(CELLS[low.bit_length() - 1])
+        mask ^= low
+    return cells
+
+
+def ternary_index(x_bits, o_bits) -> int:
+    '''Return the base-3 index of a position, below 3**9'''
+    return TERNARY[x_bits] + 2 * TERNARY[o_bits]
+
+
+def has_line(bits) -> bool:
+    '''Return True if bits cover one of the eight winning lines'''
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+class BitBoard:
+    '''3x3 position as two 9-bit integers, one per player'''
+
+    __slots__ = ('x_bits', 'o_bits')
+
+    def __init__(self, x_bits=0, o_bits=0):
+        self.x_bits = x_bits
+        self.o_bits = o_bits
+
+    def __getitem__(self, cell):
+        bit = BIT[cell]
+        if self.x_bits & bit:
+            return x
+        if self.o_bits & bit:
+            return o
+        return None
+
+    def __setitem__(self, cell, symbol):
+        bit = BIT[cell]
+        self.x_bits &= ~bit
+        self.o_bits &= ~bit
+        if symbol == x:
+            self.x_bits |= bit
+        elif symbol == o:
+            self.o_bits |= bit
+        elif symbol is not None:
+            raise ValueError(f'Invalid symbol: {symbol}')
+
+    def __eq__(self, other):
+        return isinstance(other, BitBoard) and \
+            self.x_bits == other.x_bits and self.o_bits == other.o_bits
+
+    def __hash__(self):
+        return self.key()
+
+    def key(self) -> int:
+        '''Return an 18-bit integer identifying the position'''
+        return self.x_bits << 9 | self.o_bits
+
+    def copy(self):
+        return BitBoard(self.x_bits, self.o_bits)
+
+    def clear(self):
+        self.x_bits = self.o_bits = 0
+
+    def empty_mask(self) -> int:
+        return FULL & ~(self.x_bits | self.o_bits)
+
+    def empty_cells(self):
+        return bit_cells(self.empty_mask())
+
+    def win(self, symbol) -> bool:
+        return has_line(self.x_bits if symbol == x else self.o_bits)
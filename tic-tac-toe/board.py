@@ -1,5 +1,8 @@
 from btree import BinaryTree
 from btnode import Node
+from bitboard import BitBoard, LINES_THROUGH, TERNARY
+from symmetry import MASKS, WEIGHTS, smallest
+from engine import NegamaxEngine
 from random import randint
 
 
@@ -11,59 +14,162 @@ x = 'X'
 o = 'O'
 
 
+class Row:
+    '''View of one row of a Board, indexable like a list'''
+
+    __slots__ = ('_board', '_i')
+
+    def __init__(self, board, i):
+        self._board = board
+        self._i = i
+
+    def __getitem__(self, j):
+        if not -1 < j < 3:
+            raise IndexError('Column out of range')
+        return self._board._bits[self._i, j]
+
+    def __setitem__(self, j, item):
+        if not -1 < j < 3:
+            raise IndexError('Column out of range')
+        self._board._bits[self._i, j] = item
+        self._board._rescan()
+
+    def __len__(self):
+        return 3
+
+    def __iter__(self):
+        return (self[j] for j in range(3))
+
+
 class Board:
     def __init__(self):
-        self._board = [[None, None, None],
-                       [None, None, None],
-                       [None, None, None]]
+        self._bits = BitBoard()
         self._n_moves = 0
         self._last_move = None
+        self._moves = []  # (move, previous last move) for pop
+        self._winner = None
+        self._indexes = [0] * 8  # base-3 index of each symmetric image
 
     def __getitem__(self, position):
-        return self._board[position]
+        if not -1 < position < 3:
+            raise IndexError('Row out of range')
+        return Row(self, position)
 
     def __setitem__(self, position, item):
-        self[position] = item
+        '''Replace a whole row with three symbols (or None)'''
+        if not -1 < position < 3:
+            raise IndexError('Row out of range')
+        for j, symbol in enumerate(item):
+            self._bits[position, j] = symbol
+        self._rescan()
 
     def __str__(self):
         string = ''
-        for i in self._board:
+        for i in range(3):
             string += '|'
-            for j in i:
+            for j in self[i]:
                 string += str(j) if j else ' '
             string += '|\n'
         return string
 
+    def _rescan(self):
+        '''Recompute the incremental state after cells were written
+        directly; the move history is lost'''
+        bits = self._bits
+        self._n_moves = bin(bits.x_bits | bits.o_bits).count('1')
+        self._moves = []
+        self._winner = x if bits.win(x) else o if bits.win(o) else None
+        self._indexes = [TERNARY[masks[bits.x_bits]] +
+                         2 * TERNARY[masks[bits.o_bits]] for masks in MASKS]
+
     def current_symbol(self):
         return o if self._n_moves % 2 else x
 
-    def make_a_move(self, move: tuple) -> bool:
-        '''Make a move, if it is invalid raise ValueError'''
-        if self[move[0]][move[1]] or \
-            not (-1 < move[0] < 3) or \
-                not(-1 < move[1] < 3):
+    def push(self, move: tuple):
+        '''Make a move, if it is invalid raise ValueError.
+        Win status and position indexes are updated from the move alone'''
+        if not (-1 < move[0] < 3) or \
+            not(-1 < move[1] < 3) or \
+                self._bits[move] or self._winner is not None:
             raise ValueError('Invalid move')
-        self[move[0]][move[1]] = self.current_symbol()
+        n = 3 * move[0] + move[1]
+        bit = 1 << n
+        symbol = self.current_symbol()
+        bits = self._bits
+        if symbol == x:
+            bits.x_bits |= bit
+            stones, digit = bits.x_bits, 1
+        else:
+            bits.o_bits |= bit
+            stones, digit = bits.o_bits, 2
+        self._moves.append((move, self._last_move))
+        for line in LINES_THROUGH[n]:
+            if stones & line == line:
+                self._winner = symbol
+                break
+        indexes = self._indexes
+        for t in range(8):
+            indexes[t] += digit * WEIGHTS[t][n]
         self._n_moves += 1
         self._last_move = move
 
+    def pop(self) -> tuple:
+        '''Take back the last move pushed and return it'''
+        if not self._moves:
+            raise ValueError('No move to take back')
+        move, self._last_move = self._moves.pop()
+        n = 3 * move[0] + move[1]
+        bit = 1 << n
+        bits = self._bits
+        if bits.x_bits & bit:
+            bits.x_bits ^= bit
+            digit = 1
+        else:
+            bits.o_bits ^= bit
+            digit = 2
+        indexes = self._indexes
+        for t in range(8):
+            indexes[t] -= digit * WEIGHTS[t][n]
+        self._winner = None  # play stops at a win, so none before it
+        self._n_moves -= 1
+        return move
+
+    def make_a_move(self, move: tuple) -> bool:
+        '''Make a move, if it is invalid raise ValueError'''
+        self.push(move)
+
+    def winner(self):
+        '''Return the symbol of the player who won, or None'''
+        return self._winner
+
     def win(self, player_symbol: str) -> bool:
         '''Return True if player won, False otherwise'''
-        if self._n_moves < 6:
-            return False
-        for i in range(3):
-            if player_symbol == self[i][0] == self[i][1] == self[i][2]:
-                return True
-            if player_symbol == self[0][i] == self[1][i] == self[2][i]:
-                return True
-        if player_symbol == self[0][0] == self[1][1] == self[2][2]:
-            return True
-        if player_symbol == self[0][2] == self[1][1] == self[2][0]:
-            return True
-        return False
+        return self._winner == player_symbol
 
     def clear(self):
-        self._board = [[None for i in range(3)] for i in range(3)]
+        self._bits.clear()
+        self._rescan()
+        self._last_move = None
+
+    def copy(self):
+        '''Return an independent copy of the board'''
+        board = Board()
+        board._bits = self._bits.copy()
+        board._n_moves = self._n_moves
+        board._last_move = self._last_move
+        board._moves = self._moves[:]
+        board._winner = self._winner
+        board._indexes = self._indexes[:]
+        return board
+
+    def key(self) -> int:
+        '''Return the base-3 index of the position'''
+        return self._indexes[0]
+
+    def canonical(self):
+        '''Return (index, transform) of the canonical symmetric image,
+        see symmetry.canonical'''
+        return smallest(self._indexes)
 
     def lose(self, player_symbol) -> bool:
         '''Return True if player lost, False otherwise'''
@@ -71,11 +177,14 @@ class Board:
 
     def draw(self):
         '''Return True if draw'''
-        return (not self.win(x) and not self.win(o) and self._n_moves > 0)\
-            and self._n_moves == 9
+        return self._winner is None and self._n_moves == 9
+
+    def empty_mask(self) -> int:
+        '''Return the empty cells as a 9-bit mask, cell (i, j) is bit 3*i+j'''
+        return self._bits.empty_mask()
 
     def empty_cells(self):
-        return [(i, j) for i in range(3) for j in range(3) if not self[i][j]]
+        return self._bits.empty_cells()
 
     def build_tree(self):
         '''Build a tree for analyzing outcomes of a random game
@@ -95,8 +204,6 @@ class Board:
         '''
 
         tree = BinaryTree(Node(None))
-        # save to preserve board's initial state
-        last_move = self._last_move
 
         def extend_tree(tree, player_symbol):
             available_moves = self.empty_cells()
@@ -113,31 +220,33 @@ class Board:
                 return
 
             move1 = available_moves.pop(random_index(available_moves))
-            self.make_a_move(move1)
+            self.push(move1)
 
             tree.insert_left(Node(move1))
             extend_tree(tree.left_child, next_symbol)
 
-            self[move1[0]][move1[1]] = None
-            self._n_moves -= 1
+            self.pop()
 
             if available_moves:
                 move2 = available_moves.pop(random_index(available_moves))
-                self.make_a_move(move2)
+                self.push(move2)
 
                 tree.insert_right(Node(move2))
                 extend_tree(tree.right_child, next_symbol)
 
-                self[move2[0]][move2[1]] = None
-                self._n_moves -= 1
+                self.pop()
 
         extend_tree(tree, self.current_symbol())
-        self._last_move = last_move  # return board to its initial state
         return tree
 
-    def decide_move(self, tree):
-        '''Given a tree as generated by Board.build_tree\
-            pick a starategically better move'''
+    def decide_move(self, tree=None, deadline=None, engine=None):
+        '''Pick a move. Given a tree as generated by Board.build_tree\
+            pick a starategically better move; otherwise ask engine
+            (a shared NegamaxEngine by default) for the best move it
+            finds before deadline, a perf_counter time'''
+        if tree is None:
+            engine = engine or _default_engine
+            return engine.choose_move(self, deadline)
 
         def recurse(tree):
             if tree is None or tree.root.data is None:
@@ -155,9 +264,10 @@ class Board:
         return move1 if score1 > score2 else move2
 
     def game_over(self):
-        if self.win(x) or self.win(o) or self.draw():
-            return True
-        return False
+        return self._winner is not None or self._n_moves == 9
+
+
+_default_engine = NegamaxEngine()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,223 @@
+from math import inf
+from time import perf_counter
+from bitboard import BIT, WIN_MASKS
+from symmetry import to_canonical, from_canonical
+
+
+WIN = 10  # a win after n moves scores WIN - n, so faster wins score higher
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# center first, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+ORDERED_BITS = [(move, BIT[move]) for move in MOVE_ORDER]
+
+
+class SearchTimeout(Exception):
+    '''Raised inside a search once its deadline has passed'''
+
+
+def evaluate(board) -> float:
+    '''Return a guess of the value for the side to move at the search
+    horizon: lines still open for it minus lines open for the opponent,
+    scaled below the smallest win score'''
+    bits = board._bits
+    if board._n_moves % 2:
+        mine, theirs = bits.o_bits, bits.x_bits
+    else:
+        mine, theirs = bits.x_bits, bits.o_bits
+    score = 0
+    for mask in WIN_MASKS:
+        if not mask & theirs and mask & mine:
+            score += 1
+        elif not mask & mine and mask & theirs:
+            score -= 1
+    return score / 10
+
+
+class AlphaBetaSearch:
+    '''Negamax with alpha-beta pruning and a transposition table, the
+    search shared by the engines. A subclass supplies the game:
+
+        _key(board)             (key, t): the table key of the position
+                                and what _to_key and _from_key need to
+                                map its moves into the key's frame
+        _evaluate(board)        value for the side to move at the horizon
+        _moves(board, first)    the moves to search, first one first
+        _moves_left(board)      plies until the board is full
+
+    and the scale of its scores in WIN, a win after n moves scoring
+    WIN - n. Table entries are (depth, value, flag, move), value being
+    exact or a LOWER or UPPER bound; an entry searched to the end of
+    the game holds for any depth. The counters nodes, cutoffs,
+    tt_probes and tt_hits are left for the caller to reset.
+    '''
+
+    WIN = WIN
+    check_mask = 63  # the deadline is checked every check_mask + 1 nodes
+
+    def __init__(self):
+        self._table = {}
+        self._deadline = inf
+        self.nodes = 0
+        self.cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.depth = 0
+        self.value = None
+
+    def clear(self):
+        '''Forget all searched positions'''
+        self._table = {}
+
+    def _to_key(self, move, t):
+        return move
+
+    def _from_key(self, move, t):
+        return move
+
+    def _negamax(self, board, depth, alpha, beta):
+        '''Return the value of board for the side to move, searching
+        depth plies ahead'''
+        self.nodes += 1
+        if not self.nodes & self.check_mask and \
+                perf_counter() > self._deadline:
+            raise SearchTimeout
+        if board.winner() is not None:
+            return -(self.WIN - board._n_moves)
+        moves_left = self._moves_left(board)
+        if not moves_left:
+            return 0
+        if depth == 0:
+            return self._evaluate(board)
+
+        key, t = self._key(board)
+        entry = self._table.get(key)
+        best_move = None
+        self.tt_probes += 1
+        if entry is not None:
+            self.tt_hits += 1
+            entry_depth, value, flag, best_move = entry
+            if entry_depth >= depth and (
+                    flag == EXACT or
+                    (flag == LOWER and value >= beta) or
+                    (flag == UPPER and value <= alpha)):
+                return value
+            best_move = self._from_key(best_move, t)
+
+        alpha_orig = alpha
+        best = -inf
+        for move in self._moves(board, best_move):
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha)
+            finally:
+                board.pop()
+            if score > best:
+                best, best_move = score, move
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                self.cutoffs += 1
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if depth >= moves_left:
+            depth = inf
+        self._table[key] = (depth, best, flag, self._to_key(best_move, t))
+        return best
+
+
+class NegamaxEngine(AlphaBetaSearch):
+    '''Game-tree search: negamax with alpha-beta pruning, move ordering
+    and a transposition table.
+
+    Without a deadline the search is exact. With one, it deepens
+    iteratively, one ply at a time, and answers with the best move of
+    the deepest finished iteration, so a move never takes much longer
+    than asked for. The depth reached is left in self.depth.
+
+    The table lives as long as the engine, so after the first
+    search from a position every later request for it is a lookup.
+    It is keyed by the canonical form of the position, so the eight
+    symmetric images of a position share one entry.
+    '''
+
+    def _ordered_moves(self, board, first):
+        empty = board.empty_mask()
+        moves = [move for move, bit in ORDERED_BITS if empty & bit]
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    _moves = _ordered_moves
+
+    def _key(self, board):
+        return board.canonical()
+
+    def _to_key(self, move, t):
+        return to_canonical(move, t)
+
+    def _from_key(self, move, t):
+        return from_canonical(move, t)
+
+    def _evaluate(self, board):
+        return evaluate(board)
+
+    def _moves_left(self, board):
+        return 9 - board._n_moves
+
+    def _root_move(self, board):
+        key, t = board.canonical()
+        return from_canonical(self._table[key][3], t)
+
+    def choose_move(self, board, deadline=None):
+        '''Return the best move for the side to move on board: the
+        optimal one, or without enough time before deadline (a
+        perf_counter time) the best one found by then. The depth
+        reached and the positions searched are left in self.depth
+        and self.nodes, with the cutoffs and table probes and hits
+        of the search in self.cutoffs, self.tt_probes, self.tt_hits'''
+        if board.game_over():
+            raise ValueError('Game is over')
+        self.nodes = self.cutoffs = self.tt_probes = self.tt_hits = 0
+        remaining = 9 - board._n_moves
+        if deadline is None:
+            depths = [remaining]
+        else:
+            depths = range(1, remaining + 1)
+        self._deadline = inf if deadline is None else deadline
+        best_move = None
+        self.depth = 0
+        for depth in depths:
+            try:
+                # a full window always leaves an exact entry with its move
+                self.value = self._negamax(board, depth, -inf, inf)
+            except SearchTimeout:
+                break
+            best_move, self.depth = self._root_move(board), depth
+        self._deadline = inf
+        if best_move is None:
+            best_move = self._ordered_moves(board, None)[0]
+        return best_move
+
+
+if __name__ == '__main__':
+    from board import Board
+
+    engine = NegamaxEngine()
+    board = Board()
+    while not board.game_over():
+        start = perf_counter()
+        move = engine.choose_move(board)
+        elapsed = perf_counter() - start
+        print(f'{board.current_symbol()} plays {move}: value {engine.value}, '
+              f'{engine.nodes} nodes, {elapsed * 1000:.3f} ms')
+        board.make_a_move(move)
+    print(board)
@@ -1,6 +1,8 @@
 from board import Board
+from perfectplay import TableEngine
+from searchstats import StatsRecorder
 from random import choice
-from time import sleep
+from time import perf_counter, sleep
 
 
 with open('preparations.txt') as file:
@@ -20,6 +22,17 @@ machines = 0
 o = 'O'
 x = 'X'
 
+# how long the computer may think about a move, in seconds; a searching
+# engine answers with the best move found when the time is up
+THINK_TIME = 0.5
+
+# perfect play, one table lookup per move; the table is loaded once
+engine = TableEngine(randomize=True)
+
+# search statistics of every computer move, kept when the game is run
+# with --stats (and written as CSV with --stats PATH)
+recorder = None
+
 
 def main():
     global humans
@@ -59,8 +72,13 @@ def main():
     while not board.game_over():
         if user == 'computer':
             print("Computer's turn:")
-            sleep(1)  # for a more realistic game experience
-            board.make_a_move(board.decide_move(board.build_tree()))
+            deadline = perf_counter() + THINK_TIME
+            if recorder is None:
+                move = board.decide_move(deadline=deadline, engine=engine)
+            else:
+                move = recorder.choose_move(engine, board, deadline)
+                print(recorder.last())
+            board.make_a_move(move)
         else:
             print('Your turn: ')
             user_move(board)
@@ -99,4 +117,13 @@ def game_loop():
 
 
 if __name__ == '__main__':
+    import sys
+
+    if '--stats' in sys.argv:
+        recorder = StatsRecorder()
     game_loop()
+    if recorder is not None:
+        print(recorder.summary())
+        at = sys.argv.index('--stats')
+        if at + 1 < len(sys.argv):
+            recorder.write_csv(sys.argv[at + 1])
@@ -0,0 +1,271 @@
+from concurrent.futures import ProcessPoolExecutor
+from math import inf, log, sqrt
+from random import Random
+from time import perf_counter
+
+
+class MCTSNode:
+    '''Statistics of one move in the search tree. wins are counted for
+    symbol, the player who made the move, a draw counting half'''
+
+    __slots__ = ('move', 'symbol', 'parent', 'children', 'untried',
+                 'visits', 'wins')
+
+    def __init__(self, move, symbol, parent, untried):
+        self.move = move
+        self.symbol = symbol
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+    def child(self, move):
+        for node in self.children:
+            if node.move == move:
+                return node
+        return None
+
+    def select(self, exploration):
+        '''Return the child with the highest UCT score'''
+        log_visits = log(self.visits)
+        best, best_score = None, -inf
+        for node in self.children:
+            score = node.wins / node.visits + \
+                exploration * sqrt(log_visits / node.visits)
+            if score > best_score:
+                best, best_score = node, score
+        return best
+
+
+def legal_moves(board):
+    '''Moves worth expanding: near stones on boards that know how'''
+    if hasattr(board, 'candidate_moves'):
+        return board.candidate_moves()
+    return board.empty_cells()
+
+
+def history(board):
+    '''Return the moves pushed on board so far'''
+    return [move for move, _ in board._moves]
+
+
+class MCTSEngine:
+    '''Monte Carlo tree search with UCT selection and random playouts.
+
+    Each call runs `playouts` playouts, or fewer if the deadline comes
+    first. The tree is kept between calls: when the next position
+    follows from the previous root by the moves played since, the
+    search continues from the matching subtree. With workers > 1 the
+    playouts are split over a process pool, each worker growing its own
+    tree from the root, and the root visit counts are summed.
+    '''
+
+    def __init__(self, playouts=2000, exploration=1.4, workers=1, seed=None):
+        # every search runs at least one playout per worker, so the
+        # root always has a visited move to choose
+        if playouts < 1:
+            raise ValueError('playouts must be at least 1')
+        self.playouts = playouts
+        self.exploration = exploration
+        self.workers = workers
+        self._rng = Random(seed)
+        self._root = None
+        self._root_history = None
+        self._pool = None
+        self.last_playouts = 0
+        self.playouts_per_second = 0.0
+        self.depth = 0     # deepest tree node reached by the last search
+        self.tt_probes = 0  # searches that looked for a tree to reuse
+        self.tt_hits = 0    # ... and found one already searched
+
+    def clear(self):
+        '''Forget the search tree'''
+        self._root = None
+        self._root_history = None
+
+    def close(self):
+        '''Shut the process pool down, if one was started'''
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _reuse_root(self, board):
+        '''Return the subtree for board left by earlier searches, or a
+        new root'''
+        moves = history(board)
+        root = self._root
+        if root is not None and len(moves) == board._n_moves and \
+                self._root_history == moves[:len(self._root_history)]:
+            for move in moves[len(self._root_history):]:
+                root = root.child(move)
+                if root is None:
+                    break
+        else:
+            root = None
+        self.tt_probes += 1
+        if root is None:
+            root = MCTSNode(None, None, None, legal_moves(board))
+        elif root.visits:
+            self.tt_hits += 1
+        root.parent = None
+        self._root, self._root_history = root, moves
+        return root
+
+    def _playout(self, board, root):
+        '''Run one selection, expansion, rollout and backup step,
+        leaving board as it was'''
+        rng = self._rng
+        node = root
+        pushed = 0
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+            board.push(node.move)
+            pushed += 1
+        if node.untried and not board.game_over():
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            symbol = board.current_symbol()
+            board.push(move)
+            pushed += 1
+            untried = [] if board.game_over() else legal_moves(board)
+            child = MCTSNode(move, symbol, node, untried)
+            node.children.append(child)
+            node = child
+        if pushed > self.depth:
+            self.depth = pushed
+        if not board.game_over():
+            moves = board.empty_cells()
+            rng.shuffle(moves)
+            for move in moves:
+                board.push(move)
+                pushed += 1
+                if board.game_over():
+                    break
+        winner = board.winner()
+        for _ in range(pushed):
+            board.pop()
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.symbol:
+                node.wins += 1
+            node = node.parent
+
+    def search(self, board, deadline=None):
+        '''Grow the tree for board and return the root'''
+        root = self._reuse_root(board)
+        self.depth = 0
+        done = 0
+        while done < self.playouts:
+            self._playout(board, root)
+            done += 1
+            if deadline is not None and not done & 15 and \
+                    perf_counter() > deadline:
+                break
+        self.last_playouts = done
+        return root
+
+    def choose_move(self, board, deadline=None):
+        '''Return the most visited move after the playout budget (or
+        the deadline, a perf_counter time) is spent'''
+        if board.game_over():
+            raise ValueError('Game is over')
+        self.tt_probes = self.tt_hits = 0
+        start = perf_counter()
+        if self.workers > 1:
+            visits = self._parallel_visits(board, deadline)
+        else:
+            root = self.search(board, deadline)
+            visits = {node.move: node.visits for node in root.children}
+        elapsed = perf_counter() - start
+        self.playouts_per_second = self.last_playouts / elapsed \
+            if elapsed else 0.0
+        return max(visits, key=visits.get)
+
+    @property
+    def nodes(self):
+        '''Playouts of the last search, as the search statistics count'''
+        return self.last_playouts
+
+    def _parallel_visits(self, board, deadline):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+        share = -(-self.playouts // self.workers)
+        timeout = None if deadline is None else deadline - perf_counter()
+        jobs = [self._pool.submit(_root_visits, board, share,
+                                  self.exploration, self._rng.getrandbits(32),
+                                  timeout)
+                for _ in range(self.workers)]
+        visits = {}
+        self.last_playouts = 0
+        for job in jobs:
+            counts, done = job.result()
+            self.last_playouts += done
+            for move, count in counts.items():
+                visits[move] = visits.get(move, 0) + count
+        return visits
+
+
+def _root_visits(board, playouts, exploration, seed, timeout):
+    '''Worker of the root-parallel mode: search from board and return
+    (visits per root move, playouts done)'''
+    engine = MCTSEngine(playouts, exploration, seed=seed)
+    deadline = None if timeout is None else perf_counter() + timeout
+    root = engine.search(board, deadline)
+    return {node.move: node.visits for node in root.children}, \
+        engine.last_playouts
+
+
+def play(board, engine_x, engine_o):
+    '''Play board to the end and return the winner symbol or None'''
+    while not board.game_over():
+        engine = engine_x if board.current_symbol() == 'X' else engine_o
+        board.push(engine.choose_move(board))
+    return board.winner()
+
+
+class RandomEngine:
+    '''Plays a uniformly random empty cell'''
+
+    def __init__(self, seed=None):
+        self._rng = Random(seed)
+
+    def choose_move(self, board):
+        return self._rng.choice(board.empty_cells())
+
+
+def benchmark(games=20):
+    '''Print playouts per second on several boards and the score of
+    MCTS against random and perfect play for growing budgets'''
+    from board import Board
+    from mnkboard import MNKBoard
+    from perfectplay import TableEngine
+
+    print('playouts per second')
+    for name, factory in [('3x3', Board),
+                          ('7x7 k=4', lambda: MNKBoard(7, 7, 4)),
+                          ('15x15 k=5', lambda: MNKBoard(15, 15, 5))]:
+        engine = MCTSEngine(2000, seed=0)
+        engine.choose_move(factory())
+        print(f'{name:>10}: {engine.playouts_per_second:10.0f}')
+
+    print('\n3x3 score of MCTS (win 1, draw 0.5) against')
+    print(f'{"playouts":>10} {"random":>8} {"perfect":>8}')
+    for budget in (10, 50, 200, 1000):
+        scores = []
+        for opponent in (RandomEngine(0), TableEngine(randomize=True)):
+            score = 0
+            for game in range(games):
+                engine = MCTSEngine(budget, seed=game)
+                if game % 2:
+                    winner, side = play(Board(), opponent, engine), 'O'
+                else:
+                    winner, side = play(Board(), engine, opponent), 'X'
+                score += 0.5 if winner is None else winner == side
+            scores.append(score / games)
+        print(f'{budget:>10} {scores[0]:8.2f} {scores[1]:8.2f}')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,211 @@
+from random import Random
+
+
+x = 'X'
+o = 'O'
+
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+class MNKBoard:
+    '''m x n board where k in a row wins, e.g. MNKBoard(15, 15, 5) for
+    gomoku. Same move API as Board: push/pop/make_a_move, win, draw,
+    game_over, empty_cells, current_symbol.
+
+    A win is looked for only along the four lines through the last
+    move, in O(k). The board also keeps, for every k-cell window, how
+    many stones of each player it holds, which gives search engines
+    an O(1) static evaluation and a cheap measure of each move.
+    '''
+
+    def __init__(self, m=15, n=15, k=5, seed=0):
+        if not 0 < k <= max(m, n):
+            raise ValueError('k does not fit on the board')
+        self.m, self.n, self.k = m, n, k
+        self._cells = [None] * (m * n)
+        self._n_moves = 0
+        self._last_move = None
+        self._moves = []  # (move, previous last move) for pop
+        self._winner = None
+
+        # window weights: a window holding c stones of one player only
+        self._weights = [0] + [4 ** c for c in range(1, k + 1)]
+        self._windows = []     # cell numbers of every window
+        self._windows_of = [[] for _ in range(m * n)]
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        cells = [(i + di * s) * n + j + dj * s
+                                 for s in range(k)]
+                        for cell in cells:
+                            self._windows_of[cell].append(len(self._windows))
+                        self._windows.append(cells)
+        self._x_count = [0] * len(self._windows)
+        self._o_count = [0] * len(self._windows)
+        self._score = 0  # sum of window weights, X positive
+
+        # Zobrist keys: one random 64-bit number per cell and player
+        rng = Random(seed)
+        self._zobrist = [(rng.getrandbits(64), rng.getrandbits(64))
+                         for _ in range(m * n)]
+        self._key = 0
+
+    def __getitem__(self, position):
+        '''Return row position as a list'''
+        if not -1 < position < self.m:
+            raise IndexError('Row out of range')
+        return self._cells[position * self.n:(position + 1) * self.n]
+
+    def __str__(self):
+        string = ''
+        for i in range(self.m):
+            string += '|'
+            for j in self[i]:
+                string += str(j) if j else ' '
+            string += '|\n'
+        return string
+
+    def current_symbol(self):
+        return o if self._n_moves % 2 else x
+
+    def _line_length(self, i, j, di, dj, symbol) -> int:
+        '''Count symbol's stones from (i, j) on, not counting (i, j)'''
+        count = 0
+        i, j = i + di, j + dj
+        while count < self.k - 1 and 0 <= i < self.m and 0 <= j < self.n \
+                and self._cells[i * self.n + j] == symbol:
+            count += 1
+            i, j = i + di, j + dj
+        return count
+
+    def _update_windows(self, cell, symbol, step):
+        weights = self._weights
+        x_count, o_count = self._x_count, self._o_count
+        score = self._score
+        for w in self._windows_of[cell]:
+            n_x, n_o = x_count[w], o_count[w]
+            before = weights[n_x] if not n_o else \
+                -weights[n_o] if not n_x else 0
+            if symbol == x:
+                n_x += step
+                x_count[w] = n_x
+            else:
+                n_o += step
+                o_count[w] = n_o
+            after = weights[n_x] if not n_o else \
+                -weights[n_o] if not n_x else 0
+            score += after - before
+        self._score = score
+
+    def push(self, move: tuple):
+        '''Make a move, if it is invalid raise ValueError'''
+        i, j = move
+        if not (-1 < i < self.m) or not (-1 < j < self.n) or \
+                self._cells[i * self.n + j] or self._winner is not None:
+            raise ValueError('Invalid move')
+        cell = i * self.n + j
+        symbol = self.current_symbol()
+        self._cells[cell] = symbol
+        self._moves.append((move, self._last_move))
+        self._update_windows(cell, symbol, 1)
+        self._key ^= self._zobrist[cell][symbol == o]
+        for di, dj in DIRECTIONS:
+            if 1 + self._line_length(i, j, di, dj, symbol) + \
+                    self._line_length(i, j, -di, -dj, symbol) >= self.k:
+                self._winner = symbol
+                break
+        self._n_moves += 1
+        self._last_move = move
+
+    def pop(self) -> tuple:
+        '''Take back the last move pushed and return it'''
+        if not self._moves:
+            raise ValueError('No move to take back')
+        move, self._last_move = self._moves.pop()
+        cell = move[0] * self.n + move[1]
+        symbol = self._cells[cell]
+        self._cells[cell] = None
+        self._update_windows(cell, symbol, -1)
+        self._key ^= self._zobrist[cell][symbol == o]
+        self._winner = None  # play stops at a win, so none before it
+        self._n_moves -= 1
+        return move
+
+    def make_a_move(self, move: tuple):
+        '''Make a move, if it is invalid raise ValueError'''
+        self.push(move)
+
+    def winner(self):
+        '''Return the symbol of the player who won, or None'''
+        return self._winner
+
+    def win(self, player_symbol: str) -> bool:
+        '''Return True if player won, False otherwise'''
+        return self._winner == player_symbol
+
+    def lose(self, player_symbol) -> bool:
+        '''Return True if player lost, False otherwise'''
+        return self.win(x if player_symbol == o else o)
+
+    def draw(self):
+        '''Return True if draw'''
+        return self._winner is None and self._n_moves == self.m * self.n
+
+    def game_over(self):
+        return self._winner is not None or self._n_moves == self.m * self.n
+
+    def empty_cells(self):
+        n = self.n
+        return [divmod(cell, n) for cell, symbol in enumerate(self._cells)
+                if symbol is None]
+
+    def key(self) -> int:
+        '''Return the Zobrist hash of the position'''
+        return self._key
+
+    def copy(self):
+        '''Return an independent copy of the board'''
+        board = MNKBoard.__new__(MNKBoard)
+        board.__dict__.update(self.__dict__)
+        board._cells = self._cells[:]
+        board._moves = self._moves[:]
+        board._x_count = self._x_count[:]
+        board._o_count = self._o_count[:]
+        return board
+
+    def evaluate(self) -> int:
+        '''Return a static score of the position for the side to move'''
+        return -self._score if self._n_moves % 2 else self._score
+
+    def move_potential(self, move) -> int:
+        '''Return how much a stone on move would add to the windows
+        through it, for either player: attack plus defence'''
+        weights = self._weights
+        x_count, o_count = self._x_count, self._o_count
+        total = 0
+        for w in self._windows_of[move[0] * self.n + move[1]]:
+            n_x, n_o = x_count[w], o_count[w]
+            if not n_o:
+                total += weights[n_x + 1] - weights[n_x]
+            if not n_x:
+                total += weights[n_o + 1] - weights[n_o]
+        return total
+
+    def candidate_moves(self, radius=1):
+        '''Return the empty cells within radius of a stone, the center
+        of an empty board, or every empty cell if none is that close'''
+        if not self._moves:
+            return [(self.m // 2, self.n // 2)]
+        m, n, cells = self.m, self.n, self._cells
+        seen = set()
+        moves = []
+        for (i, j), _ in self._moves:
+            for a in range(max(i - radius, 0), min(i + radius + 1, m)):
+                for b in range(max(j - radius, 0), min(j + radius + 1, n)):
+                    cell = a * n + b
+                    if cells[cell] is None and cell not in seen:
+                        seen.add(cell)
+                        moves.append((a, b))
+        return moves or self.empty_cells()
@@ -0,0 +1,118 @@
+from math import inf
+from time import perf_counter
+from engine import AlphaBetaSearch, SearchTimeout
+
+
+WIN = 10 ** 9  # a win after n moves scores WIN - n
+
+
+class MNKEngine(AlphaBetaSearch):
+    '''Alpha-beta search for MNKBoard that plays within a time budget.
+
+    Iterative deepening searches depth 1, 2, ... until the deadline
+    and answers with the best move of the deepest finished iteration.
+    Only empty cells near stones are considered, ordered by how much
+    they add to the windows through them, and only the `width` best
+    of them below the root. Leaves are scored by the board's
+    incremental window evaluation; a transposition table keyed by the
+    board's Zobrist hash carries move ordering between iterations.
+    '''
+
+    WIN = WIN
+    check_mask = 255
+
+    def __init__(self, time_limit=1.0, width=12, radius=1, max_depth=64):
+        AlphaBetaSearch.__init__(self)
+        self.time_limit = time_limit
+        self.width = width
+        self.radius = radius
+        self.max_depth = max_depth
+
+    def _ordered_moves(self, board, first=None):
+        moves = board.candidate_moves(self.radius)
+        moves.sort(key=board.move_potential, reverse=True)
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def _moves(self, board, first):
+        return self._ordered_moves(board, first)[:self.width]
+
+    def _key(self, board):
+        return board.key(), None
+
+    def _evaluate(self, board):
+        return board.evaluate()
+
+    def _moves_left(self, board):
+        return board.m * board.n - board._n_moves
+
+    def _search_root(self, board, depth, moves):
+        '''Return (value, move) of a full-width search to depth'''
+        alpha = -inf
+        best_move = moves[0]
+        for move in moves:
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, -inf, -alpha)
+            finally:
+                board.pop()
+            if score > alpha:
+                alpha, best_move = score, move
+        return alpha, best_move
+
+    def choose_move(self, board, deadline=None):
+        '''Return the best move found before deadline (a perf_counter
+        time, by default time_limit seconds from now). The depth
+        reached, its value and the nodes searched are left in
+        self.depth, self.value and self.nodes, with the cutoffs and
+        table probes and hits in self.cutoffs, self.tt_probes and
+        self.tt_hits'''
+        if board.game_over():
+            raise ValueError('Game is over')
+        if deadline is None:
+            deadline = perf_counter() + self.time_limit
+        self._deadline = deadline
+        self.nodes = self.depth = self.cutoffs = 0
+        self.tt_probes = self.tt_hits = 0
+        self.value = None
+        moves = self._ordered_moves(board)
+        best_move = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                value, move = self._search_root(board, depth, moves)
+            except SearchTimeout:
+                break
+            best_move, self.depth, self.value = move, depth, value
+            moves.remove(move)
+            moves.insert(0, move)
+            # Stop at a forced win or loss, or once every line ends
+            # within the horizon. That is forced only among the moves
+            # width and radius let through, so it is not proven; but
+            # every iteration prunes alike, and a deeper one would
+            # reach the same result
+            if abs(value) > WIN // 2 or \
+                    depth >= board.m * board.n - board._n_moves:
+                break
+        self._deadline = inf
+        return best_move
+
+
+if __name__ == '__main__':
+    from mnkboard import MNKBoard
+    import sys
+
+    m, n, k = (int(arg) for arg in sys.argv[1:4]) if len(sys.argv) > 3 \
+        else (15, 15, 5)
+    board = MNKBoard(m, n, k)
+    engine = MNKEngine(time_limit=1.0)
+    while not board.game_over():
+        start = perf_counter()
+        move = engine.choose_move(board)
+        print(f'{board.current_symbol()} plays {move}: depth {engine.depth},'
+              f' value {engine.value}, {engine.nodes} nodes, '
+              f'{perf_counter() - start:.2f} s')
+        board.push(move)
+    print(board)
+    print('winner:', board.winner())
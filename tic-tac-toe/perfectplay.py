@@ -0,0 +1,64 @@
+from array import array
+from random import choice
+from sys import byteorder
+from bitboard import bit_cells
+from solver import MAGIC, TABLE_PATH, OUTCOME_SHIFT
+from symmetry import mask_from_canonical
+
+
+OUTCOMES = ('loss', 'draw', 'win')
+
+_tables = {}
+
+
+def load_table(path=TABLE_PATH):
+    '''Return the table stored at path as a dict from canonical index
+    to entry, reading the file only once'''
+    if path not in _tables:
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not a perfect-play table')
+            records = array('H')
+            records.frombytes(file.read())
+        if byteorder == 'big':
+            records.byteswap()
+        _tables[path] = dict(zip(records[::2], records[1::2]))
+    return _tables[path]
+
+
+class TableEngine:
+    '''Perfect play by a single lookup in the table written by solver.py'''
+
+    def __init__(self, path=TABLE_PATH, randomize=False):
+        self._table = load_table(path)
+        self._randomize = randomize
+        # statistics of the last choose_move: no position is searched,
+        # only looked up in the table
+        self.nodes = self.depth = self.cutoffs = 0
+        self.tt_probes = self.tt_hits = 0
+
+    def _entry(self, board):
+        '''Return the entry of board and its transform to canonical form'''
+        key, t = board.canonical()
+        entry = self._table.get(key)
+        self.tt_probes += 1
+        if entry is None:
+            raise ValueError('Position is unreachable or the game is over')
+        self.tt_hits += 1
+        return entry, t
+
+    def outcome(self, board) -> str:
+        '''Return 'win', 'draw' or 'loss' for the side to move'''
+        return OUTCOMES[self._entry(board)[0] >> OUTCOME_SHIFT & 3]
+
+    def best_moves(self, board):
+        '''Return all optimal moves for the side to move'''
+        entry, t = self._entry(board)
+        return bit_cells(mask_from_canonical(entry & 0x1ff, t))
+
+    def choose_move(self, board, deadline=None):
+        '''Return an optimal move, the first one or a random one. A
+        lookup needs no time budget, so deadline is ignored'''
+        self.tt_probes = self.tt_hits = 0
+        moves = self.best_moves(board)
+        return choice(moves) if self._randomize else moves[0]
@@ -0,0 +1,161 @@
+'''Search statistics of move decisions, recorded on request
+
+Engines keep a few counters about their last choose_move call:
+
+    nodes       positions searched (playouts for MCTS)
+    depth       plies searched ahead (deepest tree node for MCTS)
+    cutoffs     alpha-beta cutoffs
+    tt_probes   transposition table lookups (tree reuse for MCTS)
+    tt_hits     lookups that found an entry
+
+A StatsRecorder times each decision it is asked to make and turns
+those counters into a MoveStats, adding nodes per second and the
+effective branching factor, nodes ** (1 / depth). Records can be kept
+one per move and written as CSV, or only summed per engine, which
+costs nothing per game and merges across processes.
+'''
+from csv import writer as csv_writer
+from time import perf_counter
+
+
+FIELDS = ('engine', 'move', 'nodes', 'depth', 'cutoffs', 'tt_probes',
+          'tt_hits', 'seconds')
+
+
+class MoveStats:
+    '''Statistics of one move decision'''
+
+    __slots__ = FIELDS
+
+    def __init__(self, engine, move, nodes=0, depth=0, cutoffs=0,
+                 tt_probes=0, tt_hits=0, seconds=0.0):
+        self.engine = engine
+        self.move = move
+        self.nodes = nodes
+        self.depth = depth
+        self.cutoffs = cutoffs
+        self.tt_probes = tt_probes
+        self.tt_hits = tt_hits
+        self.seconds = seconds
+
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0
+
+    def hit_ratio(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0
+
+    def branching(self) -> float:
+        '''Return the effective branching factor'''
+        return self.nodes ** (1 / self.depth) if self.depth else 0
+
+    def row(self):
+        '''Return the fields and the derived figures, for CSV'''
+        return [getattr(self, field) for field in FIELDS] + \
+            [round(self.nps()), round(self.hit_ratio(), 4),
+             round(self.branching(), 3)]
+
+    def __str__(self):
+        return (f'{self.engine}: {self.move}, {self.nodes} nodes, depth '
+                f'{self.depth}, {self.cutoffs} cutoffs, tt hits '
+                f'{self.hit_ratio():.1%}, branching {self.branching():.2f}, '
+                f'{self.seconds * 1000:.3f} ms, {self.nps():.0f} nps')
+
+
+class EngineTotals:
+    '''Sums of the statistics of many decisions by one engine'''
+
+    def __init__(self):
+        self.decisions = 0
+        self.nodes = self.depth = self.cutoffs = 0
+        self.tt_probes = self.tt_hits = 0
+        self.seconds = 0.0
+
+    def add(self, stats):
+        self.decisions += 1
+        self.nodes += stats.nodes
+        self.depth += stats.depth
+        self.cutoffs += stats.cutoffs
+        self.tt_probes += stats.tt_probes
+        self.tt_hits += stats.tt_hits
+        self.seconds += stats.seconds
+
+    def update(self, other):
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def mean(self, engine='mean') -> MoveStats:
+        '''Return the statistics of an average decision'''
+        n = self.decisions or 1
+        return MoveStats(engine, None, self.nodes / n, self.depth / n,
+                         self.cutoffs / n, self.tt_probes / n,
+                         self.tt_hits / n, self.seconds / n)
+
+
+class StatsRecorder:
+    '''Asks engines for moves and records statistics of every decision.
+    With keep=False only the totals per engine are kept'''
+
+    def __init__(self, keep=True):
+        self.keep = keep
+        self.records = []
+        self.totals = {}
+
+    def choose_move(self, engine, board, deadline=None, name=None):
+        '''Return engine's move on board and record how it was found'''
+        start = perf_counter()
+        if deadline is None:
+            move = engine.choose_move(board)
+        else:
+            move = engine.choose_move(board, deadline)
+        seconds = perf_counter() - start
+        stats = MoveStats(name or type(engine).__name__, move,
+                          getattr(engine, 'nodes', 0),
+                          getattr(engine, 'depth', 0),
+                          getattr(engine, 'cutoffs', 0),
+                          getattr(engine, 'tt_probes', 0),
+                          getattr(engine, 'tt_hits', 0), seconds)
+        if self.keep:
+            self.records.append(stats)
+        if stats.engine not in self.totals:
+            self.totals[stats.engine] = EngineTotals()
+        self.totals[stats.engine].add(stats)
+        return move
+
+    def last(self):
+        return self.records[-1] if self.records else None
+
+    def update(self, other):
+        '''Add the records and totals of another recorder'''
+        self.records.extend(other.records)
+        for name, totals in other.totals.items():
+            if name not in self.totals:
+                self.totals[name] = EngineTotals()
+            self.totals[name].update(totals)
+
+    def means(self):
+        '''Return the mean decision of every engine'''
+        return [totals.mean(name) for name, totals in self.totals.items()]
+
+    def write_csv(self, file, records=None):
+        '''Write one row per record, the kept ones by default, to a path
+        or file object'''
+        if isinstance(file, str):
+            with open(file, 'w', newline='') as stream:
+                return self.write_csv(stream, records)
+        out = csv_writer(file)
+        out.writerow(FIELDS + ('nps', 'hit_ratio', 'branching'))
+        for stats in self.records if records is None else records:
+            out.writerow(stats.row())
+
+    def summary(self):
+        '''Return a table of the mean decision of every engine'''
+        lines = [f'{"engine":>14} {"moves":>8} {"nodes":>9} {"depth":>6} '
+                 f'{"cutoffs":>8} {"tt hit":>7} {"branch":>7} '
+                 f'{"ms":>8} {"nps":>10}']
+        for mean, totals in zip(self.means(), self.totals.values()):
+            lines.append(f'{mean.engine:>14} {totals.decisions:8} '
+                         f'{mean.nodes:9.1f} {mean.depth:6.2f} '
+                         f'{mean.cutoffs:8.1f} {mean.hit_ratio():7.1%} '
+                         f'{mean.branching():7.2f} '
+                         f'{mean.seconds * 1000:8.3f} {mean.nps():10.0f}')
+        return '\n'.join(lines)
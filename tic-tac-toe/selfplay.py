@@ -0,0 +1,237 @@
+'''Headless self-play: engines against each other, many games at once
+
+    python selfplay.py                      standard matchups
+    python selfplay.py mcts random 10000    one matchup, 10000 games
+    python selfplay.py mcts random 10000 4  ... on 4 processes
+
+Games are split into batches and played on a process pool; engines
+alternate sides from game to game. The report gives games per second,
+the win/draw/loss rates of the first engine and the distribution of
+the time each engine took per move. Latencies are kept as counts per
+0.1 us step, so batches merge exactly and memory does not grow with
+the number of games.
+
+With --stats after the arguments, the search statistics of every
+engine (see searchstats.py) are summed over all moves and printed,
+and with --stats PATH also written to PATH as CSV, one row per engine.
+'''
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from time import perf_counter, perf_counter_ns
+import random
+from board import Board
+from engine import NegamaxEngine
+from mcts import MCTSEngine, RandomEngine
+from perfectplay import TableEngine
+from searchstats import StatsRecorder
+
+
+TICK = 100  # ns per latency step
+
+
+class LegacyEngine:
+    '''The original AI: a random game tree from build_tree, scored
+    by decide_move'''
+
+    def __init__(self):
+        self.nodes = 0
+        self.depth = 0
+
+    def choose_move(self, board, deadline=None):
+        tree = board.build_tree()
+        self.nodes, self.depth = 0, 0
+        stack = [(tree, 0)]
+        while stack:
+            node, depth = stack.pop()
+            self.nodes += 1
+            self.depth = max(self.depth, depth)
+            for child in (node.left_child, node.right_child):
+                if child is not None:
+                    stack.append((child, depth + 1))
+        return board.decide_move(tree)
+
+
+# name -> factory taking a seed
+ENGINES = {
+    'random': RandomEngine,
+    'legacy': lambda seed: LegacyEngine(),
+    'negamax': lambda seed: NegamaxEngine(),
+    'table': lambda seed: TableEngine(randomize=True),
+    'mcts': lambda seed: MCTSEngine(200, seed=seed),
+}
+
+
+class Latencies:
+    '''Distribution of move times in TICK steps'''
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+
+    def add(self, ns):
+        tick = ns // TICK
+        self.counts[tick] = self.counts.get(tick, 0) + 1
+        self.total += 1
+
+    def update(self, other):
+        for tick, count in other.counts.items():
+            self.counts[tick] = self.counts.get(tick, 0) + count
+        self.total += other.total
+
+    def percentile(self, p) -> float:
+        '''Return the p-th percentile in microseconds'''
+        if not self.total:
+            return 0
+        rank = min(self.total - 1, int(p / 100 * self.total))
+        seen = 0
+        for tick in sorted(self.counts):
+            seen += self.counts[tick]
+            if seen > rank:
+                return tick * TICK / 1000
+        return 0
+
+    def mean(self) -> float:
+        '''Return the mean in microseconds'''
+        if not self.total:
+            return 0
+        return sum(tick * count for tick, count in self.counts.items()) \
+            * TICK / 1000 / self.total
+
+
+class SimulationReport:
+    '''Outcome of a run from the first engine's point of view'''
+
+    def __init__(self, names):
+        self.names = names
+        self.games = self.wins = self.draws = self.losses = 0
+        self.moves = 0
+        self.seconds = 0.0
+        self.latencies = {name: Latencies() for name in set(names)}
+        self.stats = StatsRecorder(keep=False)
+
+    def update(self, other):
+        self.games += other.games
+        self.wins += other.wins
+        self.draws += other.draws
+        self.losses += other.losses
+        self.moves += other.moves
+        for name, latencies in other.latencies.items():
+            self.latencies[name].update(latencies)
+        self.stats.update(other.stats)
+
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0
+
+    def rates(self):
+        '''Return the (win, draw, loss) rates of the first engine'''
+        games = self.games or 1
+        return self.wins / games, self.draws / games, self.losses / games
+
+    def __str__(self):
+        first, second = self.names
+        win, draw, loss = self.rates()
+        lines = [f'{first} vs {second}: {self.games} games in '
+                 f'{self.seconds:.2f} s, {self.games_per_second():.0f} '
+                 f'games/s, {self.moves / (self.games or 1):.1f} moves/game',
+                 f'    {first}: win {win:.3f} draw {draw:.3f} '
+                 f'loss {loss:.3f}',
+                 f'    {"us per move":>14} {"mean":>9} {"p50":>9} '
+                 f'{"p90":>9} {"p99":>9} {"max":>9}']
+        for name in dict.fromkeys(self.names):
+            latencies = self.latencies[name]
+            lines.append(f'    {name:>14} {latencies.mean():9.1f} ' +
+                         ' '.join(f'{latencies.percentile(p):9.1f}'
+                                  for p in (50, 90, 99, 100)))
+        if self.stats.totals:
+            lines.append('    search statistics per move')
+            lines.extend('    ' + line
+                         for line in self.stats.summary().split('\n'))
+        return '\n'.join(lines)
+
+    def write_stats(self, path):
+        '''Write the mean search statistics of each engine as CSV'''
+        self.stats.write_csv(path, self.stats.means())
+
+
+def play_batch(first, second, games, seed, offset=0, stats=False):
+    '''Play games between the engines named first and second and return
+    their SimulationReport; the first engine plays X in even games,
+    counting from offset. With stats, search statistics are summed'''
+    random.seed(seed)  # build_tree and the table engine use the module
+    engines = ENGINES[first](seed), ENGINES[second](seed + 1)
+    report = SimulationReport((first, second))
+    board = Board()
+    for game in range(offset, offset + games):
+        sides = (0, 1) if game % 2 == 0 else (1, 0)
+        board.clear()
+        while not board.game_over():
+            side = sides[board._n_moves % 2]
+            start = perf_counter_ns()
+            if stats:
+                move = report.stats.choose_move(engines[side], board,
+                                                name=report.names[side])
+            else:
+                move = engines[side].choose_move(board)
+            report.latencies[report.names[side]].add(
+                perf_counter_ns() - start)
+            board.push(move)
+        report.moves += board._n_moves
+        winner = board.winner()
+        if winner is None:
+            report.draws += 1
+        elif (winner == 'X') == (sides[0] == 0):
+            report.wins += 1
+        else:
+            report.losses += 1
+        report.games += 1
+    return report
+
+
+def simulate(first, second, games=1000, workers=None, batch=None, seed=0,
+             stats=False):
+    '''Play games between two engines from ENGINES over a pool of
+    workers processes and return the merged SimulationReport'''
+    workers = workers or cpu_count() or 1
+    batch = batch or max(1, min(10000, -(-games // (workers * 4))))
+    starts = range(0, games, batch)
+    counts = [min(batch, games - start) for start in starts]
+    args = ([first] * len(counts), [second] * len(counts), counts,
+            [seed + 2 * n for n in starts], starts, [stats] * len(counts))
+    report = SimulationReport((first, second))
+    start = perf_counter()
+    if workers == 1:
+        parts = list(map(play_batch, *args))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(play_batch, *args))
+    for part in parts:
+        report.update(part)
+    report.seconds = perf_counter() - start
+    return report
+
+
+if __name__ == '__main__':
+    import sys
+
+    args = sys.argv[1:]
+    stats = '--stats' in args
+    stats_path = None
+    if stats:
+        at = args.index('--stats')
+        stats_path = args[at + 1] if at + 1 < len(args) else None
+        del args[at:]
+    if len(args) > 1:
+        games = int(args[2]) if len(args) > 2 else 1000
+        workers = int(args[3]) if len(args) > 3 else None
+        report = simulate(args[0], args[1], games, workers, stats=stats)
+        print(report)
+        if stats_path:
+            report.write_stats(stats_path)
+    else:
+        for first, second, games in [('random', 'random', 20000),
+                                     ('table', 'random', 20000),
+                                     ('negamax', 'table', 20000),
+                                     ('legacy', 'random', 2000),
+                                     ('mcts', 'random', 1000),
+                                     ('mcts', 'table', 1000)]:
+            print(simulate(first, second, games, stats=stats), '\n')
@@ -0,0 +1,281 @@
+'''Asyncio tic-tac-toe server: many games at once over a line protocol
+
+    python server.py [port]          serve on 127.0.0.1:port (8765)
+    python server.py unix PATH       serve on a Unix socket
+    python server.py load [sessions [concurrency [games]]]
+                                     load-test a server started in-process
+
+One command per line, one reply line per command:
+    NEW [X|O]   start a game playing X or O, a random side if left out
+    MOVE i j    play cell (i, j), counting from 0
+    SCORE       games won by you and by the computer in this session
+    QUIT        end the session
+Replies:
+    STATE you cells status [i j]
+                you is your symbol, cells the nine cells row by row with
+                '.' for empty, status 'play', 'win', 'loss' or 'draw'
+                for you, and i j the computer's move if it made one
+    SCORE humans machines
+    BYE
+    ERROR message
+
+Every connection has its own board and score. The computer's search
+runs in a process pool, so a long search never stalls the event loop.
+'''
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from random import Random, choice
+from time import perf_counter
+from board import Board
+from engine import NegamaxEngine
+
+
+x = 'X'
+o = 'O'
+
+THINK_TIME = 0.05  # seconds the computer may search per move
+
+_engine = None  # one per worker process, so its table stays warm
+
+
+class ThinkError(Exception):
+    '''Raised when the computer's search fails to produce a move'''
+
+
+def _think(board, think_time):
+    global _engine
+    if _engine is None:
+        _engine = NegamaxEngine()
+    return _engine.choose_move(board, perf_counter() + think_time)
+
+
+class Session:
+    '''State of one connection: the game in progress and the score'''
+
+    def __init__(self):
+        self.board = None
+        self.symbol = None
+        self.humans = 0
+        self.machines = 0
+
+
+class GameServer:
+    '''Serves a Session per connection; see the module docstring for
+    the protocol'''
+
+    def __init__(self, think_time=THINK_TIME, workers=None):
+        self.think_time = think_time
+        self.workers = workers
+        self._executor = self._new_executor()
+        self._server = None
+        self.sessions = 0
+        self.moves = 0
+
+    def _new_executor(self):
+        # spawned, not forked: a forked worker would inherit the sockets
+        # open at the time and keep those connections from closing
+        return ProcessPoolExecutor(self.workers,
+                                   mp_context=get_context('spawn'))
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        '''Start listening on host:port, or on the Unix socket path'''
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server
+
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown()
+
+    async def handle(self, reader, writer):
+        session = Session()
+        self.sessions += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # longer than the stream's limit
+                    writer.write(b'ERROR line too long\n')
+                    break
+                if not line:
+                    break
+                try:
+                    words = line.decode().split()
+                except UnicodeDecodeError:
+                    reply = 'ERROR invalid encoding'
+                else:
+                    try:
+                        reply = await self._command(session, words)
+                    except ThinkError as error:
+                        # the board is left on the computer's turn
+                        session.board = None
+                        reply = f'ERROR {error}, send NEW'
+                writer.write(reply.encode() + b'\n')
+                await writer.drain()
+                if reply == 'BYE':
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _command(self, session, words):
+        if not words:
+            return 'ERROR empty command'
+        command, args = words[0].upper(), words[1:]
+        if command == 'NEW':
+            symbol = args[0].upper() if args else choice([x, o])
+            if symbol not in (x, o):
+                return 'ERROR symbol must be X or O'
+            session.board, session.symbol = Board(), symbol
+            move = None
+            if symbol == o:
+                move = await self._computer_move(session.board)
+            return self._state(session, move)
+        if command == 'MOVE':
+            board = session.board
+            if board is None or board.game_over():
+                return 'ERROR no game in progress, send NEW'
+            try:
+                i, j = (int(arg) for arg in args)
+                board.make_a_move((i, j))
+            except ValueError:
+                return 'ERROR invalid move'
+            self.moves += 1
+            move = None
+            if not board.game_over():
+                move = await self._computer_move(board)
+            if board.win(session.symbol):
+                session.humans += 1
+            elif board.lose(session.symbol):
+                session.machines += 1
+            return self._state(session, move)
+        if command == 'SCORE':
+            return f'SCORE {session.humans} {session.machines}'
+        if command == 'QUIT':
+            return 'BYE'
+        return f'ERROR unknown command {command}'
+
+    async def _computer_move(self, board):
+        '''Play the computer's move on board and return it.
+        Raises: ThinkError if the search failed; a broken pool is
+        replaced, so later moves can be searched again'''
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            move = await loop.run_in_executor(executor, _think, board,
+                                              self.think_time)
+            board.make_a_move(move)
+        except BrokenProcessPool:
+            if self._executor is executor:
+                self._executor = self._new_executor()
+                executor.shutdown(wait=False)
+            raise ThinkError('computer could not move: worker died')
+        except Exception as error:
+            raise ThinkError(f'computer could not move: '
+                             f'{type(error).__name__}')
+        self.moves += 1
+        return move
+
+    def _state(self, session, move):
+        board, symbol = session.board, session.symbol
+        cells = ''.join(board[i][j] or '.' for i in range(3) for j in range(3))
+        status = 'win' if board.win(symbol) else \
+            'loss' if board.lose(symbol) else \
+            'draw' if board.draw() else 'play'
+        state = f'STATE {symbol} {cells} {status}'
+        return state if move is None else f'{state} {move[0]} {move[1]}'
+
+
+async def _client(host, port, path, games, rng):
+    '''Play games games of random moves in one session and return the
+    number of moves made on the boards'''
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    async def ask(line):
+        writer.write(line.encode() + b'\n')
+        await writer.drain()
+        reply = (await reader.readline()).decode().split()
+        if not reply or reply[0] == 'ERROR':
+            raise RuntimeError(' '.join(reply) or 'connection closed')
+        return reply
+
+    moves = 0
+    for _ in range(games):
+        _, _, cells, status = (await ask('NEW'))[:4]
+        while status == 'play':
+            cell = rng.choice([n for n, c in enumerate(cells) if c == '.'])
+            reply = await ask(f'MOVE {cell // 3} {cell % 3}')
+            cells, status = reply[2:4]
+        moves += 9 - cells.count('.')
+    await ask('QUIT')
+    writer.close()
+    return moves
+
+
+async def load_test(sessions=1000, concurrency=100, games=1,
+                    host='127.0.0.1', port=8765, path=None, seed=0):
+    '''Open sessions connections, concurrency at a time, each playing
+    games random games, and print sessions and moves per second'''
+    limit = asyncio.Semaphore(concurrency)
+    rng = Random(seed)
+
+    async def one():
+        async with limit:
+            return await _client(host, port, path, games, rng)
+
+    start = perf_counter()
+    moves = sum(await asyncio.gather(*(one() for _ in range(sessions))))
+    elapsed = perf_counter() - start
+    print(f'{sessions} sessions, {sessions * games} games, {moves} moves '
+          f'in {elapsed:.2f} s: {sessions / elapsed:.0f} sessions/s, '
+          f'{moves / elapsed:.0f} moves/s')
+
+
+async def _serve(port=8765, path=None):
+    server = GameServer()
+    await server.start(port=port, path=path)
+    print('serving on', server.address())
+    try:
+        await server._server.serve_forever()
+    finally:
+        await server.close()
+
+
+async def _load(sessions=1000, concurrency=100, games=1):
+    server = GameServer()
+    await server.start(port=0)
+    try:
+        await load_test(sessions, concurrency, games,
+                        port=server.address()[1])
+    finally:
+        await server.close()
+
+
+if __name__ == '__main__':
+    import sys
+
+    args = sys.argv[1:]
+    if args and args[0] == 'load':
+        numbers = [int(arg) for arg in args[1:]]
+        asyncio.run(_load(*numbers))
+    elif args and args[0] == 'unix':
+        asyncio.run(_serve(path=args[1]))
+    else:
+        asyncio.run(_serve(int(args[0]) if args else 8765))
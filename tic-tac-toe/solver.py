@@ -0,0 +1,85 @@
+'''Offline solver writing the perfect-play table used by perfectplay.py
+
+Run `python solver.py` to regenerate perfect_play.bin.
+
+Only one position of every symmetry class is stored (see symmetry.py).
+The file holds records of two little-endian uint16, sorted by the
+first: the canonical base-3 index of a live position, where the game
+is not over, and its entry:
+    bits 0-8    best moves in the canonical orientation, cell (i, j)
+                is bit 3*i+j
+    bits 9-10   outcome for the side to move: 0 loss, 1 draw, 2 win
+'''
+from array import array
+from sys import byteorder
+from bitboard import FULL, has_line
+from engine import WIN
+from symmetry import canonical, MASKS
+import os
+
+
+MAGIC = b'TTT2'
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'perfect_play.bin')
+
+OUTCOME_SHIFT = 9
+LOSS, DRAW, WIN_OUTCOME = 0, 1, 2
+
+
+def solve():
+    '''Return a dict mapping the canonical index of every live
+    position to its entry'''
+    entries = {}
+    values = {}
+
+    def value(mine, theirs, n_moves):
+        '''Return the score of the side to move, which owns mine'''
+        if n_moves % 2 == 0:
+            key, t = canonical(mine, theirs)
+        else:
+            key, t = canonical(theirs, mine)
+        if key in values:
+            return values[key]
+        if has_line(theirs):
+            result = -(WIN - n_moves)
+        elif n_moves == 9:
+            result = 0
+        else:
+            result = None
+            best_mask = 0
+            empty = FULL & ~(mine | theirs)
+            while empty:
+                bit = empty & -empty
+                empty ^= bit
+                score = -value(theirs, mine | bit, n_moves + 1)
+                if result is None or score > result:
+                    result, best_mask = score, bit
+                elif score == result:
+                    best_mask |= bit
+            outcome = WIN_OUTCOME if result > 0 else \
+                DRAW if result == 0 else LOSS
+            entries[key] = outcome << OUTCOME_SHIFT | MASKS[t][best_mask]
+        values[key] = result
+        return result
+
+    value(0, 0, 0)
+    return entries
+
+
+def write_table(entries, path=TABLE_PATH):
+    records = array('H')
+    for key in sorted(entries):
+        records.append(key)
+        records.append(entries[key])
+    if byteorder == 'big':
+        records.byteswap()
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(records.tobytes())
+
+
+if __name__ == '__main__':
+    entries = solve()
+    write_table(entries)
+    print(f'{len(entries)} live positions written to {TABLE_PATH} '
+          f'({len(MAGIC) + 4 * len(entries)} bytes)')
@@ -0,0 +1,71 @@
+'''Symmetry canonicalization of 3x3 positions
+
+The eight rotations and reflections of the board (the D4 group) are
+applied as permutations of the nine cell bits. A position is
+represented by the transform that gives the smallest base-3 index;
+moves are mapped into that orientation and back with the same
+tables, so caches and tables store each position once.
+'''
+from bitboard import CELLS, TERNARY
+
+
+# where cell (i, j) goes under each transform
+TRANSFORMS = [lambda i, j: (i, j),          # identity
+              lambda i, j: (j, 2 - i),      # rotate 90
+              lambda i, j: (2 - i, 2 - j),  # rotate 180
+              lambda i, j: (2 - j, i),      # rotate 270
+              lambda i, j: (i, 2 - j),      # mirror left-right
+              lambda i, j: (2 - i, j),      # mirror top-bottom
+              lambda i, j: (j, i),          # main diagonal
+              lambda i, j: (2 - j, 2 - i)]  # anti-diagonal
+
+INDEX = {cell: n for n, cell in enumerate(CELLS)}
+
+PERMS = [[INDEX[transform(*cell)] for cell in CELLS]
+         for transform in TRANSFORMS]
+INVERSE = [next(u for u in range(8)
+                if all(PERMS[u][PERMS[t][n]] == n for n in range(9)))
+           for t in range(8)]
+
+# WEIGHTS[t][n] is what a stone of X on bit n adds to the index of
+# image t; O adds twice as much, so the indexes update incrementally
+WEIGHTS = [[3 ** perm[n] for n in range(9)] for perm in PERMS]
+
+# MASKS[t][mask] is mask with every cell moved by transform t
+MASKS = [[sum(1 << perm[n] for n in range(9) if mask >> n & 1)
+          for mask in range(1 << 9)] for perm in PERMS]
+
+
+def canonical(x_bits, o_bits):
+    '''Return (index, transform): the smallest base-3 index among the
+    eight symmetric images of the position and the transform giving it'''
+    best = None
+    best_t = 0
+    for t in range(8):
+        masks = MASKS[t]
+        i = TERNARY[masks[x_bits]] + 2 * TERNARY[masks[o_bits]]
+        if best is None or i < best:
+            best, best_t = i, t
+    return best, best_t
+
+
+def smallest(indexes):
+    '''Return (index, transform) for the eight image indexes of a
+    position, as kept incrementally by Board'''
+    best = min(indexes)
+    return best, indexes.index(best)
+
+
+def to_canonical(move, t):
+    '''Return move as seen in the canonical orientation'''
+    return CELLS[PERMS[t][INDEX[move]]]
+
+
+def from_canonical(move, t):
+    '''Return a move of the canonical orientation as played on the board'''
+    return CELLS[PERMS[INVERSE[t]][INDEX[move]]]
+
+
+def mask_from_canonical(mask, t) -> int:
+    '''Return a move mask of the canonical orientation as on the board'''
+    return MASKS[INVERSE[t]][mask]